@@ -1,3 +1,16 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import StartupFingerprint
+from .paginators import EstimatedCountPaginator
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_per_page = 50
+
+
+@admin.register(StartupFingerprint)
+class StartupFingerprintAdmin(admin.ModelAdmin):
+    list_display = ("name", "value", "updated")
+    readonly_fields = ("name", "value", "updated")
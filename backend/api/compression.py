@@ -0,0 +1,115 @@
+import gzip
+import hashlib
+import re
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.cache import patch_vary_headers
+
+from users.authentication import LRUCache
+from . import metrics
+
+try:
+    import brotli
+except ImportError:  # brotli необязателен, без него отдаем только gzip
+    brotli = None
+
+COMPRESSIBLE_TYPES = re.compile(
+    r"^(text/|application/(json|javascript|xml)|image/svg\+xml)", re.IGNORECASE
+)
+# Порядок предпочтения при равном q.
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+# Сжатые тела по хешу исходного: одинаковые страницы (например, общий список
+# рецептов для анонимов) сжимаются один раз на процесс.
+compressed_bodies = LRUCache(
+    settings.COMPRESSION_CACHE_SIZE, settings.COMPRESSION_CACHE_TIMEOUT
+)
+
+
+def choose_encoding(accept_encoding):
+    """Лучшее поддерживаемое кодирование из заголовка Accept-Encoding."""
+    weights = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.partition(";")
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[name.strip().lower()] = weight
+    best = None
+    for encoding in ENCODINGS:
+        weight = weights.get(encoding, weights.get("*", 0.0))
+        if weight > 0 and (best is None or weight > best[1]):
+            best = (encoding, weight)
+    return best[0] if best else None
+
+
+def compress(body, encoding):
+    if encoding == "br":
+        return brotli.compress(
+            body, quality=settings.COMPRESSION_BROTLI_QUALITY
+        )
+    # mtime=0: одинаковое тело всегда дает одинаковый результат.
+    return gzip.compress(
+        body, compresslevel=settings.COMPRESSION_GZIP_LEVEL, mtime=0
+    )
+
+
+def compress_cached(body, encoding):
+    key = (encoding, hashlib.blake2b(body, digest_size=16).digest())
+    compressed = compressed_bodies.get(key)
+    metrics.inc(
+        "foodgram_cache_requests_total",
+        cache="compressed_body",
+        result="miss" if compressed is None else "hit",
+    )
+    if compressed is None:
+        compressed = compress(body, encoding)
+        compressed_bodies.set(key, compressed)
+    return compressed
+
+
+class CompressionMiddleware:
+    """Сжимает ответы от COMPRESSION_MIN_SIZE байт в brotli или gzip."""
+
+    def __init__(self, get_response):
+        if not settings.COMPRESSION_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (
+            response.streaming
+            or response.has_header("Content-Encoding")
+            or not COMPRESSIBLE_TYPES.match(response.get("Content-Type", ""))
+        ):
+            return response
+        patch_vary_headers(response, ("Accept-Encoding",))
+        if len(response.content) < settings.COMPRESSION_MIN_SIZE:
+            return response
+        encoding = choose_encoding(
+            request.META.get("HTTP_ACCEPT_ENCODING", "")
+        )
+        if encoding is None:
+            return response
+        body = response.content
+        compressed = compress_cached(body, encoding)
+        if len(compressed) >= len(body):
+            return response
+        metrics.inc("foodgram_response_bytes_total", len(body), stage="raw")
+        metrics.inc(
+            "foodgram_response_bytes_total", len(compressed), stage=encoding
+        )
+        response.content = compressed
+        response["Content-Length"] = str(len(compressed))
+        response["Content-Encoding"] = encoding
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            # Сжатое тело отличается побайтно, сильный ETag становится слабым.
+            response["ETag"] = f"W/{etag}"
+        return response
@@ -0,0 +1,77 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from rest_framework.test import APIClient
+
+from api import compression
+from users.models import User
+
+ENDPOINTS = (
+    "/api/recipes/",
+    "/api/recipes/?limit=50",
+    "/api/recipes/popular/",
+    "/api/users/",
+    "/api/users/subscriptions/",
+    "/api/ingredients/",
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Fetch API responses from the current database and report bytes "
+        "saved and CPU time per request for each supported encoding, with "
+        "and without the compressed body cache."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument("--user", help="Username to authenticate as")
+
+    def handle(self, *args, **options):
+        client = APIClient(SERVER_NAME="localhost")
+        user = User.objects.filter(username=options["user"]).first()
+        if user is None:
+            user = User.objects.order_by("id").first()
+        if user is not None:
+            client.force_authenticate(user)
+        with override_settings(COMPRESSION_ENABLED=False):
+            bodies = [(path, client.get(path).content) for path in ENDPOINTS]
+        self.stdout.write(f"Encodings: {', '.join(compression.ENCODINGS)}")
+        for encoding in compression.ENCODINGS:
+            self.stdout.write(self.style.MIGRATE_HEADING(encoding))
+            total_raw = total_compressed = 0
+            for path, body in bodies:
+                compressed = compression.compress(body, encoding)
+                total_raw += len(body)
+                total_compressed += len(compressed)
+                cold = self._cpu_ms(
+                    lambda: compression.compress(body, encoding),
+                    options["requests"],
+                )
+                compression.compressed_bodies.clear()
+                warm = self._cpu_ms(
+                    lambda: compression.compress_cached(body, encoding),
+                    options["requests"],
+                )
+                self.stdout.write(
+                    f"{path:>28}: {len(body):>8} -> "
+                    f"{len(compressed):>7} bytes "
+                    f"({1 - len(compressed) / max(len(body), 1):>4.0%} "
+                    "saved), "
+                    f"{cold:.3f} ms compress, {warm:.3f} ms cached"
+                )
+            self.stdout.write(
+                f"{'total':>28}: {total_raw:>8} -> "
+                f"{total_compressed:>7} bytes "
+                f"({1 - total_compressed / max(total_raw, 1):>4.0%} saved)"
+            )
+
+    def _cpu_ms(self, function, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.process_time()
+            function()
+            timings.append((time.process_time() - started) * 1000)
+        return statistics.mean(timings)
@@ -0,0 +1,52 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.backends.postgresql.base import DatabaseWrapper
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure per-request database overhead with a new connection per "
+        "request, a persistent connection and the in-process pool."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200)
+
+    def handle(self, *args, **options):
+        default = connections["default"]
+        if default.vendor != "postgresql":
+            raise CommandError("Benchmark requires a PostgreSQL database")
+        from foodgram.postgresql_pool.base import (
+            DatabaseWrapper as PoolWrapper,
+        )
+
+        modes = (
+            ("new connection", DatabaseWrapper, 0),
+            ("persistent", DatabaseWrapper, None),
+            ("pool", PoolWrapper, 0),
+        )
+        for label, wrapper_class, max_age in modes:
+            database = wrapper_class(
+                {**default.settings_dict, "CONN_MAX_AGE": max_age},
+                alias=f"bench-{label.replace(' ', '-')}",
+            )
+            timings = []
+            for _ in range(options["requests"]):
+                started = time.perf_counter()
+                # То же, что делают обработчики request_started и
+                # request_finished.
+                database.close_if_unusable_or_obsolete()
+                with database.cursor() as cursor:
+                    cursor.execute("SELECT 1")
+                database.close_if_unusable_or_obsolete()
+                timings.append((time.perf_counter() - started) * 1000)
+            database.close()
+            timings.sort()
+            self.stdout.write(
+                f"{label:>15}: mean {statistics.mean(timings):.3f} ms, "
+                f"p50 {timings[len(timings) // 2]:.3f} ms, "
+                f"p95 {timings[int(len(timings) * 0.95)]:.3f} ms"
+            )
@@ -0,0 +1,49 @@
+import statistics
+import time
+from types import SimpleNamespace
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from rest_framework.throttling import UserRateThrottle
+
+from api.throttling import UserSharedRateThrottle
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare per-request overhead of DRF's cache throttle and the "
+        "shared one"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=5000)
+        parser.add_argument("--users", type=int, default=100)
+
+    def handle(self, *args, **options):
+        factory = APIRequestFactory()
+        requests = []
+        for number in range(options["users"]):
+            request = Request(factory.get("/api/recipes/"))
+            request.user = SimpleNamespace(
+                is_authenticated=True, pk=-1 - number
+            )
+            requests.append(request)
+        for throttle_class in (UserRateThrottle, UserSharedRateThrottle):
+            cache.clear()
+            timings = []
+            rejected = 0
+            for number in range(options["requests"]):
+                request = requests[number % len(requests)]
+                started = time.perf_counter()
+                if not throttle_class().allow_request(request, None):
+                    rejected += 1
+                timings.append((time.perf_counter() - started) * 1_000_000)
+            timings.sort()
+            self.stdout.write(
+                f"{throttle_class.__name__:>24}: "
+                f"mean {statistics.mean(timings):.1f} us, "
+                f"p99 {timings[int(len(timings) * 0.99)]:.1f} us, "
+                f"rejected {rejected}"
+            )
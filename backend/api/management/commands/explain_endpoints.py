@@ -0,0 +1,220 @@
+import json
+import re
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIClient
+
+from recipe.models import Favorite, Recipe, RecipeIngredient, ShoppingCart
+from users.models import Follow, User
+
+LARGE_TABLE_MODELS = (
+    User,
+    Recipe,
+    RecipeIngredient,
+    Favorite,
+    ShoppingCart,
+    Follow,
+)
+SORT_ROWS_THRESHOLD = 1000
+SQLITE_ALIAS = re.compile(r'(?:FROM|JOIN) "(\w+)"(?: (\w+))?')
+
+
+def _endpoints(recipe_id, author_id, ingredient_ids):
+    pantry = ",".join(map(str, ingredient_ids))
+    return [
+        ("recipes list", "/api/recipes/"),
+        ("recipes by author", f"/api/recipes/?author={author_id}"),
+        ("favorited recipes", "/api/recipes/?is_favorited=1"),
+        ("recipes in cart", "/api/recipes/?is_in_shopping_cart=1"),
+        ("recipe detail", f"/api/recipes/{recipe_id}/"),
+        ("popular recipes", "/api/recipes/popular/"),
+        ("similar recipes", f"/api/recipes/{recipe_id}/similar/"),
+        ("pantry", f"/api/recipes/pantry/?ingredients={pantry}"),
+        ("shopping list", "/api/recipes/download_shopping_cart/"),
+        ("users list", "/api/users/"),
+        ("user detail", f"/api/users/{author_id}/"),
+        ("subscriptions", "/api/users/subscriptions/"),
+        ("ingredients search", "/api/ingredients/?name=%D0%B0"),
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        "Run every API endpoint against a throwaway test database, EXPLAIN "
+        "each SELECT it issues and report sequential scans and sorts on "
+        "large tables."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=10_000)
+        parser.add_argument("--recipes", type=int, default=100_000)
+        parser.add_argument("--favorites", type=int, default=1_000_000)
+        parser.add_argument(
+            "--large-table-rows",
+            type=int,
+            default=10_000,
+            help="Tables with at least this many rows are considered large",
+        )
+        parser.add_argument(
+            "--keepdb",
+            action="store_true",
+            help="Keep the seeded test database between runs",
+        )
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, keepdb=options["keepdb"]
+        )
+        index_dir = tempfile.mkdtemp()
+        try:
+            if not Recipe.objects.exists():
+                self.stdout.write("Seeding test database...")
+                self._seed(options)
+            problems = self._check(options["large_table_rows"], index_dir)
+        finally:
+            shutil.rmtree(index_dir, ignore_errors=True)
+            connection.creation.destroy_test_db(
+                old_name, verbosity=0, keepdb=options["keepdb"]
+            )
+        if problems:
+            raise CommandError(f"{problems} query plan problem(s) found")
+        self.stdout.write(self.style.SUCCESS("No query plan problems found"))
+
+    def _seed(self, options):
+        call_command(
+            "seed_data",
+            users=options["users"],
+            recipes=options["recipes"],
+            favorites=options["favorites"],
+            seed=options["seed"],
+            stdout=self.stdout,
+        )
+
+    def _large_tables(self, threshold):
+        return {
+            model._meta.db_table
+            for model in LARGE_TABLE_MODELS
+            if model.objects.count() >= threshold
+        }
+
+    def _check(self, threshold, index_dir):
+        large_tables = self._large_tables(threshold)
+        self.stdout.write(
+            f"Large tables: {', '.join(sorted(large_tables)) or '-'}"
+        )
+        user = User.objects.get(id=Favorite.objects.values("user_id")[:1])
+        recipe = Recipe.objects.order_by("id").first()
+        ingredient_ids = list(
+            recipe.recipe_ingredients.values_list("ingredient_id", flat=True)
+        )
+        client = APIClient(SERVER_NAME="localhost")
+        client.force_authenticate(user)
+        problems = 0
+        middleware = [
+            item for item in settings.MIDDLEWARE if "debug_toolbar" not in item
+        ]
+        # Тестовая база создана только для default, а реплики из настроек
+        # указывают на рабочие базы: маршрутизатор на время проверки снят.
+        with override_settings(
+            MIDDLEWARE=middleware,
+            DATABASE_ROUTERS=[],
+            RECIPE_INDEX_DIR=index_dir,
+        ):
+            call_command("recompute_popularity", "--full", stdout=self.stdout)
+            call_command("build_similarity_index", stdout=self.stdout)
+            call_command("build_pantry_index", stdout=self.stdout)
+            for name, path in _endpoints(
+                recipe.id, recipe.author_id, ingredient_ids
+            ):
+                cache.clear()
+                with CaptureQueriesContext(connection) as queries:
+                    response = client.get(path)
+                selects = [
+                    query["sql"]
+                    for query in queries.captured_queries
+                    if query["sql"].lstrip().upper().startswith("SELECT")
+                ]
+                self.stdout.write(
+                    f"{name}: HTTP {response.status_code}, "
+                    f"{len(selects)} SELECT(s)"
+                )
+                for sql in selects:
+                    for finding in self._explain(sql, large_tables):
+                        problems += 1
+                        self.stdout.write(self.style.WARNING(f"  {finding}"))
+                        self.stdout.write(f"    {sql[:300]}")
+        return problems
+
+    def _explain(self, sql, large_tables):
+        with connection.cursor() as cursor:
+            if connection.vendor == "postgresql":
+                cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}")
+                plan = cursor.fetchone()[0]
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                return list(
+                    self._postgres_findings(plan[0]["Plan"], large_tables)
+                )
+            if connection.vendor == "sqlite":
+                cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+                aliases = {
+                    alias or table: table
+                    for table, alias in SQLITE_ALIAS.findall(sql)
+                }
+                return list(
+                    self._sqlite_findings(
+                        [row[-1] for row in cursor.fetchall()],
+                        aliases,
+                        large_tables,
+                    )
+                )
+        return []
+
+    def _postgres_findings(self, node, large_tables):
+        relation = node.get("Relation Name")
+        if node["Node Type"] == "Seq Scan" and relation in large_tables:
+            yield f"Seq Scan on {relation}"
+        if node["Node Type"] in ("Sort", "Incremental Sort"):
+            scanned = set(self._relations(node)) & large_tables
+            rows = sum(
+                child.get("Plan Rows", 0) for child in node.get("Plans", ())
+            )
+            if scanned and rows >= SORT_ROWS_THRESHOLD:
+                yield f"Sort of ~{rows} rows over {', '.join(sorted(scanned))}"
+        for child in node.get("Plans", ()):
+            yield from self._postgres_findings(child, large_tables)
+
+    def _relations(self, node):
+        if "Relation Name" in node:
+            yield node["Relation Name"]
+        for child in node.get("Plans", ()):
+            yield from self._relations(child)
+
+    def _sqlite_findings(self, details, aliases, large_tables):
+        tables = set()
+        for detail in details:
+            words = detail.split()
+            if len(words) < 2 or words[0] not in ("SCAN", "SEARCH"):
+                continue
+            table = aliases.get(words[1], words[1])
+            tables.add(table)
+            if (
+                words[0] == "SCAN"
+                and table in large_tables
+                and "INDEX" not in detail
+            ):
+                yield f"Full scan of {table}"
+        scanned = tables & large_tables
+        if scanned and any(
+            "TEMP B-TREE FOR ORDER BY" in item for item in details
+        ):
+            yield f"Sort over {', '.join(sorted(scanned))}"
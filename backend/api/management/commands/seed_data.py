@@ -0,0 +1,352 @@
+import multiprocessing
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+import numpy as np
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.utils import timezone
+
+from ingredient.models import Ingredient
+from ingredient.units import conversions
+from recipe.models import Favorite, Recipe, RecipeIngredient, ShoppingCart
+from users.models import Follow, User
+
+CHUNK_SIZE = 20_000
+# Показатели степенного закона: чем больше, тем сильнее перекос.
+AUTHOR_ALPHA = 1.1
+RECIPE_ALPHA = 1.2
+USER_ACTIVITY_ALPHA = 0.9
+INGREDIENT_ALPHA = 1.0
+
+# Контекст генерации, общий для процессов, запущенных через fork.
+_context = {}
+
+
+def _rng(seed, table, chunk):
+    # Генератор зависит только от номера блока, поэтому результат не зависит
+    # от числа процессов и порядка выполнения блоков.
+    return np.random.default_rng([seed, table, chunk])
+
+
+def _power_law(n, alpha, rng):
+    weights = 1.0 / np.arange(1, n + 1) ** alpha
+    rng.shuffle(weights)
+    return weights / weights.sum()
+
+
+@contextmanager
+def _explicit_dates(*fields):
+    """Позволяет bulk_create сохранить заданные даты в полях auto_now_add."""
+    fields = [model._meta.get_field(name) for model, name in fields]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def _dates(rng, size):
+    seconds = rng.uniform(0, _context["days"] * 86400, size)
+    return [
+        _context["now"] - timedelta(seconds=float(value)) for value in seconds
+    ]
+
+
+def _chunks(total):
+    return [
+        (number, start, min(CHUNK_SIZE, total - start))
+        for number, start in enumerate(range(0, total, CHUNK_SIZE))
+    ]
+
+
+def _insert_users(number, start, size):
+    password = _context["password"]
+    prefix = _context["prefix"]
+    User.objects.bulk_create(
+        [
+            User(
+                email=f"{prefix}{i}@example.org",
+                username=f"{prefix}{i}",
+                first_name="Seed",
+                last_name=str(i),
+                password=password,
+            )
+            for i in range(start, start + size)
+        ],
+        batch_size=_context["batch_size"],
+        ignore_conflicts=True,
+    )
+
+
+def _insert_recipes(number, start, size):
+    rng = _rng(_context["seed"], 1, number)
+    users = _context["user_ids"]
+    authors = users[rng.choice(len(users), size, p=_context["author_weights"])]
+    cooking_times = rng.integers(5, 181, size)
+    prefix = _context["prefix"]
+    Recipe.objects.bulk_create(
+        [
+            Recipe(
+                author_id=int(author),
+                name=f"{prefix} рецепт {start + i}",
+                image="recipes/images/seed.png",
+                text="Описание рецепта. " * int(rng.integers(3, 30)),
+                cooking_time=int(cooking_time),
+                pub_date=pub_date,
+            )
+            for i, (author, cooking_time, pub_date) in enumerate(
+                zip(authors, cooking_times, _dates(rng, size))
+            )
+        ],
+        batch_size=_context["batch_size"],
+        ignore_conflicts=True,
+    )
+
+
+def _insert_recipe_ingredients(number, start, size):
+    rng = _rng(_context["seed"], 2, number)
+    stop = start + size
+    recipes = _context["recipe_ids"][start:stop]
+    ingredients = _context["ingredient_ids"]
+    weights = _context["ingredient_weights"]
+    most = min(15, len(ingredients))
+    counts = np.clip(rng.poisson(7, len(recipes)), min(3, most), most)
+    factors = _context["ingredient_factors"]
+    units = _context["ingredient_units"]
+    rows = []
+    for recipe, count in zip(recipes, counts):
+        # Выборка без повторов с весами отдельно для каждого рецепта: память
+        # не зависит от размера блока.
+        positions = rng.choice(
+            len(ingredients), count, replace=False, p=weights
+        )
+        amounts = rng.integers(1, 500, count)
+        rows.extend(
+            RecipeIngredient(
+                recipe_id=int(recipe),
+                ingredient_id=int(ingredients[position]),
+                amount=int(amount),
+                canonical_amount=float(amount * factors[position]),
+                canonical_unit=units[position],
+            )
+            for position, amount in zip(positions, amounts)
+        )
+    RecipeIngredient.objects.bulk_create(
+        rows, batch_size=_context["batch_size"], ignore_conflicts=True
+    )
+
+
+def _insert_user_recipes(model, table, number, size):
+    rng = _rng(_context["seed"], table, number)
+    users = _context["user_ids"]
+    recipes = _context["recipe_ids"]
+    user_positions = rng.choice(
+        len(users), size, p=_context["activity_weights"]
+    )
+    recipe_positions = rng.choice(
+        len(recipes), size, p=_context["recipe_weights"]
+    )
+    # Одна и та же пара может выпасть в разных блоках; дата считается от самой
+    # пары, чтобы не зависеть от того, какой блок вставит ее первым.
+    pair_hash = (
+        user_positions.astype(np.uint64) * np.uint64(2654435761)
+        + recipe_positions.astype(np.uint64) * np.uint64(40503)
+        + np.uint64(_context["seed"])
+    ) % np.uint64(_context["days"] * 86400)
+    dates = [
+        _context["now"] - timedelta(seconds=int(value)) for value in pair_hash
+    ]
+    model.objects.bulk_create(
+        [
+            model(
+                user_id=int(users[user]),
+                recipe_id=int(recipes[recipe]),
+                created=date,
+            )
+            for user, recipe, date in zip(
+                user_positions, recipe_positions, dates
+            )
+        ],
+        batch_size=_context["batch_size"],
+        ignore_conflicts=True,
+    )
+
+
+def _insert_favorites(number, start, size):
+    _insert_user_recipes(Favorite, 3, number, size)
+
+
+def _insert_carts(number, start, size):
+    _insert_user_recipes(ShoppingCart, 4, number, size)
+
+
+def _insert_follows(number, start, size):
+    rng = _rng(_context["seed"], 5, number)
+    users = _context["user_ids"]
+    followers = users[
+        rng.choice(len(users), size, p=_context["activity_weights"])
+    ]
+    # Подписываются чаще на плодовитых авторов.
+    following = users[
+        rng.choice(len(users), size, p=_context["author_weights"])
+    ]
+    Follow.objects.bulk_create(
+        [
+            Follow(user_id=int(user), following_id=int(author))
+            for user, author in zip(followers, following)
+            if user != author
+        ],
+        batch_size=_context["batch_size"],
+        ignore_conflicts=True,
+    )
+
+
+def _run_chunk(task):
+    function, number, start, size = task
+    function(number, start, size)
+    return size
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate synthetic users, recipes, favorites, shopping carts and "
+        "follows with power-law distributions. The same seed produces the "
+        "same data; dates are relative to the start of the current day."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=10_000)
+        parser.add_argument("--recipes", type=int, default=100_000)
+        parser.add_argument("--favorites", type=int, default=1_000_000)
+        parser.add_argument(
+            "--carts",
+            type=int,
+            help="Shopping cart rows (default: favorites / 10)",
+        )
+        parser.add_argument(
+            "--follows", type=int, help="Follow rows (default: 3 per user)"
+        )
+        parser.add_argument("--days", type=int, default=365)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--prefix", default="seed")
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Insert chunks in parallel processes (useful on PostgreSQL)",
+        )
+
+    def handle(self, *args, **options):
+        if not Ingredient.objects.exists():
+            call_command("load_ingredients", stdout=self.stdout)
+        rng = np.random.default_rng([options["seed"], 0])
+        _context.update(
+            seed=options["seed"],
+            prefix=options["prefix"],
+            batch_size=options["batch_size"],
+            days=options["days"],
+            # Даты отсчитываются от начала дня, чтобы повторный запуск в тот же
+            # день давал те же данные.
+            now=timezone.now().replace(
+                hour=0, minute=0, second=0, microsecond=0
+            ),
+            password=make_password(None),
+        )
+        self.workers = max(1, options["workers"])
+        with _explicit_dates(
+            (Recipe, "pub_date"),
+            (Favorite, "created"),
+            (ShoppingCart, "created"),
+        ):
+            self._stage(User, _insert_users, options["users"])
+            user_ids = np.array(
+                # Порядок по имени не зависит от того, в каком порядке
+                # параллельные процессы вставили строки.
+                User.objects.filter(username__startswith=options["prefix"])
+                .order_by("username")
+                .values_list("id", flat=True)
+            )
+            _context.update(
+                user_ids=user_ids,
+                author_weights=_power_law(len(user_ids), AUTHOR_ALPHA, rng),
+                activity_weights=_power_law(
+                    len(user_ids), USER_ACTIVITY_ALPHA, rng
+                ),
+            )
+            self._stage(Recipe, _insert_recipes, options["recipes"])
+            recipe_ids = np.array(
+                Recipe.objects.filter(
+                    author_id__in=User.objects.filter(
+                        username__startswith=options["prefix"]
+                    )
+                )
+                .order_by("name")
+                .values_list("id", flat=True)
+            )
+            ingredients = list(
+                Ingredient.objects.order_by("id").values_list(
+                    "id", "measurement_unit"
+                )
+            )
+            units = conversions({unit for _, unit in ingredients})
+            _context.update(
+                recipe_ids=recipe_ids,
+                recipe_weights=_power_law(len(recipe_ids), RECIPE_ALPHA, rng),
+                ingredient_ids=np.array([pk for pk, _ in ingredients]),
+                ingredient_weights=_power_law(
+                    len(ingredients), INGREDIENT_ALPHA, rng
+                ),
+                ingredient_units=[units[unit][0] for _, unit in ingredients],
+                ingredient_factors=np.array(
+                    [units[unit][1] for _, unit in ingredients]
+                ),
+            )
+            self._stage(
+                RecipeIngredient, _insert_recipe_ingredients, len(recipe_ids)
+            )
+            self._stage(Favorite, _insert_favorites, options["favorites"])
+            carts = options["carts"]
+            self._stage(
+                ShoppingCart,
+                _insert_carts,
+                options["favorites"] // 10 if carts is None else carts,
+            )
+            follows = options["follows"]
+            self._stage(
+                Follow,
+                _insert_follows,
+                len(user_ids) * 3 if follows is None else follows,
+            )
+
+    def _stage(self, model, function, total):
+        """Вставляет строки блоками.
+
+        total — число единиц, которые генерируются блоками.
+        """
+        before = model.objects.count()
+        started = time.monotonic()
+        tasks = [(function, *chunk) for chunk in _chunks(total)]
+        if self.workers == 1 or len(tasks) == 1:
+            for task in tasks:
+                _run_chunk(task)
+        else:
+            # Дочерние процессы открывают собственные соединения.
+            connections.close_all()
+            context = multiprocessing.get_context("fork")
+            with context.Pool(self.workers) as pool:
+                for _ in pool.imap_unordered(_run_chunk, tasks):
+                    pass
+        elapsed = max(time.monotonic() - started, 1e-6)
+        # Повторяющиеся пары при вставке пропускаются, поэтому строк меньше.
+        inserted = model.objects.count() - before
+        self.stdout.write(
+            f"{model._meta.db_table}: {inserted} rows inserted "
+            f"in {elapsed:.1f}s ({inserted / elapsed:.0f} rows/s)"
+        )
@@ -0,0 +1,66 @@
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.slow_queries import collect
+
+SORT_KEYS = {"total": 1, "count": 0, "max": 2}
+
+
+class Command(BaseCommand):
+    help = (
+        "Show slow queries recorded by all workers, grouped by SQL "
+        "fingerprint, with the views and call sites that issued them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--minutes",
+            type=int,
+            default=settings.SLOW_QUERY_WINDOW_MINUTES,
+            help="Look back this many minutes",
+        )
+        parser.add_argument("--sort", choices=SORT_KEYS, default="total")
+        parser.add_argument("--limit", type=int, default=20)
+        parser.add_argument(
+            "--sites", type=int, default=3, help="Call sites to show"
+        )
+
+    def handle(self, *args, **options):
+        groups = defaultdict(lambda: [0, 0.0, 0.0, Counter(), Counter()])
+        for sql, view, site, count, total, longest in collect(
+            options["minutes"]
+        ):
+            group = groups[sql]
+            group[0] += count
+            group[1] += total
+            group[2] = max(group[2], longest)
+            group[3][view] += count
+            group[4][site] += count
+        if not groups:
+            self.stdout.write(
+                "No queries slower than "
+                f"{settings.SLOW_QUERY_THRESHOLD_MS} ms "
+                f"in the last {options['minutes']} minutes"
+            )
+            return
+        index = SORT_KEYS[options["sort"]]
+        ranked = sorted(
+            groups.items(), key=lambda item: item[1][index], reverse=True
+        )
+        for sql, (count, total, longest, views, sites) in ranked[
+            : options["limit"]
+        ]:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"{count} calls, {total:.1f} ms total, "
+                    f"{total / count:.1f} ms avg, {longest:.1f} ms max"
+                )
+            )
+            self.stdout.write(f"  {sql}")
+            for view, calls in views.most_common(options["sites"]):
+                self.stdout.write(f"  view {view}: {calls}")
+            for site, calls in sites.most_common(options["sites"]):
+                self.stdout.write(f"  at {site}: {calls}")
+            self.stdout.write("")
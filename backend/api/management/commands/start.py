@@ -0,0 +1,119 @@
+import hashlib
+import os
+import time
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connection
+
+from api.models import StartupFingerprint
+from ingredient.management.commands.load_ingredients import INGREDIENTS_FILE
+
+
+def _hash_files(paths):
+    digest = hashlib.sha256()
+    for path in sorted(paths):
+        digest.update(str(path).encode())
+        digest.update(Path(path).read_bytes())
+    return digest.hexdigest()
+
+
+def migrations_fingerprint():
+    paths = []
+    for app_config in apps.get_app_configs():
+        directory = Path(app_config.path) / "migrations"
+        if directory.is_dir():
+            paths.extend(directory.glob("*.py"))
+    database = settings.DATABASES["default"]
+    identity = f"{database['ENGINE']}:{database['HOST']}:{database['NAME']}"
+    return hashlib.sha256((identity + _hash_files(paths)).encode()).hexdigest()
+
+
+def ingredients_fingerprint():
+    return _hash_files([INGREDIENTS_FILE])
+
+
+def _stored(name):
+    try:
+        return (
+            StartupFingerprint.objects.filter(name=name)
+            .values_list("value", flat=True)
+            .first()
+        )
+    except DatabaseError:
+        # Таблицы еще нет: база пустая или миграции не применялись.
+        return None
+
+
+def _store(name, value):
+    StartupFingerprint.objects.update_or_create(
+        name=name, defaults={"value": value}
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Prepare the database and start gunicorn. Migrations and the "
+        "ingredient load are skipped when their inputs have not changed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--no-server",
+            action="store_true",
+            help="Run the preparation phases without starting gunicorn",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Run every phase regardless of stored fingerprints",
+        )
+
+    def _phase(self, label, func):
+        started = time.perf_counter()
+        result = func()
+        self.stdout.write(f"{label:<20} {time.perf_counter() - started:8.3f}s")
+        return result
+
+    def _run_if_changed(self, name, fingerprint, func, force):
+        if not force and _stored(name) == fingerprint:
+            self.stdout.write(f"{name:<20} {'skipped':>9}")
+            return
+        self._phase(name, func)
+        _store(name, fingerprint)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        fingerprints = self._phase(
+            "fingerprint",
+            lambda: {
+                "migrate": migrations_fingerprint(),
+                "load_ingredients": ingredients_fingerprint(),
+            },
+        )
+        self._run_if_changed(
+            "migrate",
+            fingerprints["migrate"],
+            lambda: call_command("migrate", interactive=False, verbosity=0),
+            options["force"],
+        )
+        self._run_if_changed(
+            "load_ingredients",
+            fingerprints["load_ingredients"],
+            lambda: call_command("load_ingredients", verbosity=0),
+            options["force"],
+        )
+        self.stdout.write(
+            f"{'total':<20} {time.perf_counter() - started:8.3f}s"
+        )
+        if options["no_server"]:
+            return
+        connection.close()
+        os.environ["STARTUP_STARTED_AT"] = str(time.time())
+        config = str(settings.BASE_DIR / "gunicorn.conf.py")
+        os.execvp(
+            "gunicorn", ["gunicorn", "-c", config, "foodgram.wsgi:application"]
+        )
@@ -0,0 +1,232 @@
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+# Границы корзин гистограмм (верхние, включительно).
+BUCKETS = {
+    "foodgram_request_duration_seconds": (
+        0.005,
+        0.01,
+        0.025,
+        0.05,
+        0.1,
+        0.25,
+        0.5,
+        1,
+        2.5,
+        5,
+        10,
+    ),
+    "foodgram_request_db_queries": (1, 2, 3, 5, 10, 20, 50, 100),
+}
+HELP = {
+    "foodgram_request_duration_seconds": "Request latency by view",
+    "foodgram_request_db_queries": "Database queries per request by view",
+    "foodgram_requests_total": "Requests by view and status code",
+    "foodgram_cache_requests_total": "Cache lookups by cache and result",
+    "foodgram_throttle_rejections_total": "Requests rejected by rate limits",
+    "foodgram_response_bytes_total": (
+        "Compressed response bytes before and after"
+    ),
+}
+
+_lock = threading.Lock()
+_counters = defaultdict(float)
+_histograms = {}
+_state = {"pid": os.getpid(), "flushed": time.monotonic()}
+
+
+def _check_pid():
+    # После fork процесс не должен дописывать счетчики родителя в свой файл.
+    if _state["pid"] != os.getpid():
+        _counters.clear()
+        _histograms.clear()
+        _state["pid"] = os.getpid()
+
+
+def inc(name, value=1, **labels):
+    key = (name, tuple(sorted(labels.items())))
+    with _lock:
+        _check_pid()
+        _counters[key] += value
+
+
+def observe(name, value, **labels):
+    key = (name, tuple(sorted(labels.items())))
+    buckets = BUCKETS[name]
+    with _lock:
+        _check_pid()
+        histogram = _histograms.get(key)
+        if histogram is None:
+            # Счетчики корзин, затем +Inf, сумма и количество.
+            histogram = _histograms[key] = [0] * (len(buckets) + 1) + [0.0, 0]
+        for index, bound in enumerate(buckets):
+            if value <= bound:
+                break
+        else:
+            index = len(buckets)
+        histogram[index] += 1
+        histogram[-2] += value
+        histogram[-1] += 1
+
+
+def dump(directory, data):
+    """Атомарно записывает данные процесса в его файл в directory."""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{os.getpid()}.json")
+    with open(f"{path}.tmp", "w") as file:
+        json.dump(data, file)
+    os.replace(f"{path}.tmp", path)
+
+
+def load_all(directory):
+    """Данные из файлов всех процессов; недописанные файлы пропускаются."""
+    if not os.path.isdir(directory):
+        return
+    for entry in os.listdir(directory):
+        if not entry.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(directory, entry)) as file:
+                yield json.load(file)
+        except (OSError, ValueError):
+            continue
+
+
+def flush(force=False):
+    """Сохраняет накопленные значения процесса в его файл."""
+    now = time.monotonic()
+    if not force and now - _state["flushed"] < settings.METRICS_FLUSH_INTERVAL:
+        return
+    with _lock:
+        _check_pid()
+        _state["flushed"] = now
+        data = {
+            "counters": [
+                [name, labels, value]
+                for (name, labels), value in _counters.items()
+            ],
+            "histograms": [
+                [name, labels, values]
+                for (name, labels), values in _histograms.items()
+            ],
+        }
+    dump(settings.METRICS_DIR, data)
+
+
+def collect():
+    """Складывает значения из файлов всех процессов."""
+    flush(force=True)
+    counters = defaultdict(float)
+    histograms = {}
+    for data in load_all(settings.METRICS_DIR):
+        for name, labels, value in data["counters"]:
+            counters[name, tuple(map(tuple, labels))] += value
+        for name, labels, values in data["histograms"]:
+            key = (name, tuple(map(tuple, labels)))
+            if key in histograms:
+                histograms[key] = [
+                    a + b for a, b in zip(histograms[key], values)
+                ]
+            else:
+                histograms[key] = values
+    return counters, histograms
+
+
+def _escape(value):
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace('"', '\\"')
+        .replace("\n", "\\n")
+    )
+
+
+def _labels(labels, extra=()):
+    pairs = [*labels, *extra]
+    if not pairs:
+        return ""
+    body = ",".join(f'{key}="{_escape(value)}"' for key, value in pairs)
+    return "{" + body + "}"
+
+
+def render():
+    """Текстовый формат экспозиции Prometheus."""
+    counters, histograms = collect()
+    by_name = defaultdict(list)
+    for (name, labels), value in counters.items():
+        by_name[name].append((labels, value))
+    for (name, labels), values in histograms.items():
+        by_name[name].append((labels, values))
+    lines = []
+    for name in sorted(by_name):
+        kind = "histogram" if name in BUCKETS else "counter"
+        lines.append(f"# HELP {name} {HELP.get(name, name)}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in sorted(by_name[name]):
+            if kind == "counter":
+                lines.append(f"{name}{_labels(labels)} {value:g}")
+                continue
+            cumulative = 0
+            for bound, count in zip((*BUCKETS[name], "+Inf"), value):
+                cumulative += count
+                bucket_labels = _labels(labels, [("le", bound)])
+                lines.append(f"{name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{name}_sum{_labels(labels)} {value[-2]:g}")
+            lines.append(f"{name}_count{_labels(labels)} {value[-1]}")
+    return "\n".join(lines) + "\n"
+
+
+def view_name(request):
+    """Имя представления вида RecipeViewSet.list для меток метрик."""
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "unmatched"
+    func = match.func
+    cls = getattr(func, "cls", None)
+    if cls is None:
+        return getattr(func, "__name__", match.view_name)
+    actions = getattr(func, "actions", None)
+    if actions:
+        action = actions.get(request.method.lower(), "unknown")
+        return f"{cls.__name__}.{action}"
+    return cls.__name__
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class MetricsMiddleware:
+    """Время ответа, число SQL-запросов и статусы по представлениям."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        counter = QueryCounter()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(
+                    connections[alias].execute_wrapper(counter)
+                )
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+        view = view_name(request)
+        observe("foodgram_request_duration_seconds", elapsed, view=view)
+        observe("foodgram_request_db_queries", counter.count, view=view)
+        inc("foodgram_requests_total", view=view, status=response.status_code)
+        flush()
+        return response
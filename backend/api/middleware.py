@@ -0,0 +1,126 @@
+import cProfile
+import io
+import os
+import pstats
+import random
+import re
+import time
+import uuid
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from rest_framework import exceptions
+
+from users.authentication import CachedTokenAuthentication
+
+PROFILE_TOP_FUNCTIONS = 40
+_SLUG = re.compile(r"[^a-zA-Z0-9]+")
+
+
+class QueryTimer:
+    """execute_wrapper, запоминающий длительность каждого SQL-запроса."""
+
+    def __init__(self, alias):
+        self.alias = alias
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append(
+                (time.perf_counter() - started, self.alias, many, sql)
+            )
+
+
+class ProfilingMiddleware:
+    """Профилирует выбранные запросы: cProfile и время SQL пишутся на диск.
+
+    Профилируется запрос сотрудника с заголовком X-Profile или случайная
+    доля PROFILING_SAMPLE_RATE всех запросов. При выключенном
+    PROFILING_ENABLED middleware не подключается вовсе.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.authentication = CachedTokenAuthentication()
+        os.makedirs(settings.PROFILING_DIR, exist_ok=True)
+
+    def __call__(self, request):
+        if not self._should_profile(request):
+            return self.get_response(request)
+        timers = [QueryTimer(alias) for alias in connections]
+        profile = cProfile.Profile()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for timer in timers:
+                stack.enter_context(
+                    connections[timer.alias].execute_wrapper(timer)
+                )
+            try:
+                profile.enable()
+            except ValueError:
+                # В этом процессе уже работает другой профилировщик
+                # (Python 3.12+).
+                return self.get_response(request)
+            try:
+                response = self.get_response(request)
+            finally:
+                profile.disable()
+        elapsed = time.perf_counter() - started
+        name = self._save(request, response, profile, timers, elapsed)
+        response["X-Profile-Id"] = name
+        return response
+
+    def _should_profile(self, request):
+        if request.META.get("HTTP_X_PROFILE"):
+            return self._is_staff(request)
+        rate = settings.PROFILING_SAMPLE_RATE
+        return rate > 0 and random.random() < rate
+
+    def _is_staff(self, request):
+        user = getattr(request, "user", None)
+        if user is not None and user.is_staff:
+            return True
+        try:
+            authenticated = self.authentication.authenticate(request)
+        except exceptions.AuthenticationFailed:
+            return False
+        return authenticated is not None and authenticated[0].is_staff
+
+    def _save(self, request, response, profile, timers, elapsed):
+        path = _SLUG.sub("-", request.path).strip("-")[:80] or "root"
+        name = (
+            f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-"
+            f"{request.method.lower()}-{path}-{uuid.uuid4().hex[:6]}"
+        )
+        base = os.path.join(settings.PROFILING_DIR, name)
+        profile.dump_stats(f"{base}.prof")
+        queries = sorted(
+            (query for timer in timers for query in timer.queries),
+            reverse=True,
+        )
+        sql_time = sum(query[0] for query in queries)
+        report = io.StringIO()
+        report.write(
+            f"{request.method} {request.get_full_path()} -> "
+            f"{response.status_code}\n"
+            f"total {elapsed * 1000:.1f} ms, SQL {sql_time * 1000:.1f} ms "
+            f"in {len(queries)} queries\n\n"
+        )
+        for duration, alias, many, sql in queries:
+            suffix = " (executemany)" if many else ""
+            report.write(
+                f"{duration * 1000:8.2f} ms [{alias}]{suffix} {sql}\n"
+            )
+        report.write("\n")
+        stats = pstats.Stats(profile, stream=report)
+        stats.sort_stats("cumulative").print_stats(PROFILE_TOP_FUNCTIONS)
+        with open(f"{base}.txt", "w", encoding="utf-8") as file:
+            file.write(report.getvalue())
+        return name
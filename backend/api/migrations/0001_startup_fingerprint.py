@@ -0,0 +1,56 @@
+# Generated by Django 4.2.21 on 2026-10-19 09:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="StartupFingerprint",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "name",
+                    models.CharField(
+                        help_text="Этап запуска, для которого сохранен отпечаток",
+                        max_length=64,
+                        unique=True,
+                        verbose_name="Этап",
+                    ),
+                ),
+                (
+                    "value",
+                    models.CharField(
+                        help_text="Хеш входных данных этапа",
+                        max_length=64,
+                        verbose_name="Отпечаток",
+                    ),
+                ),
+                (
+                    "updated",
+                    models.DateTimeField(
+                        auto_now=True,
+                        help_text="Когда этап выполнялся последний раз",
+                        verbose_name="Дата обновления",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Отпечаток запуска",
+                "verbose_name_plural": "Отпечатки запуска",
+            },
+        ),
+    ]
@@ -0,0 +1,105 @@
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+
+from foodgram.db_router import (
+    is_pinned,
+    pin_to_primary,
+    reset_replica,
+    use_replica,
+)
+
+
+class ReplicaReadMixin:
+    """Безопасные запросы и действия из replica_post_actions, которые только
+    читают данные через POST, идут на реплики, пока пользователь не писал.
+    """
+
+    replica_post_actions = ()
+
+    def _is_read(self, request):
+        return (
+            request.method in SAFE_METHODS
+            or getattr(self, "action", None) in self.replica_post_actions
+        )
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self._replica_token = use_replica(
+            self._is_read(request) and not is_pinned(request.user)
+        )
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, "_replica_token", None)
+        if token is not None:
+            reset_replica(token)
+            self._replica_token = None
+        user = getattr(request, "user", None)
+        if (
+            not self._is_read(request)
+            and response.status_code < 400
+            and user is not None
+            and user.is_authenticated
+        ):
+            pin_to_primary(user)
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+class SparseFieldsetMixin:
+    """Параметры fields= и omit= (через запятую) для безопасных запросов
+    и действий из sparse_post_actions, которые читают данные через POST.
+
+    Поля верхнего уровня, которых нет в ответе, убираются из сериализатора;
+    представления проверяют get_sparse_fields(), чтобы не делать лишних
+    запросов и аннотаций. None означает полный ответ.
+    """
+
+    sparse_post_actions = ()
+
+    def get_sparse_fields(self):
+        if hasattr(self, "_sparse_fields"):
+            return self._sparse_fields
+        params = self.request.query_params
+        self._sparse_fields = None
+        readonly = (
+            self.request.method in SAFE_METHODS
+            or self.action in self.sparse_post_actions
+        )
+        if not readonly or not ("fields" in params or "omit" in params):
+            return None
+        available = self.get_serializer_class().Meta.fields
+        requested = {
+            name: {value.strip() for value in params.get(name, "").split(",")}
+            for name in ("fields", "omit")
+        }
+        requested = {name: values - {""} for name, values in requested.items()}
+        unknown = {
+            name: sorted(values - set(available))
+            for name, values in requested.items()
+        }
+        errors = {
+            name: f"Неизвестные поля: {', '.join(values)}"
+            for name, values in unknown.items()
+            if values
+        }
+        if errors:
+            raise ValidationError(errors)
+        self._sparse_fields = frozenset(
+            name
+            for name in available
+            if (not requested["fields"] or name in requested["fields"])
+            and name not in requested["omit"]
+        )
+        return self._sparse_fields
+
+    def wants_field(self, name):
+        fields = self.get_sparse_fields()
+        return fields is None or name in fields
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        fields = self.get_sparse_fields()
+        if fields is not None:
+            target = getattr(serializer, "child", serializer)
+            for name in set(target.fields) - fields:
+                target.fields.pop(name)
+        return serializer
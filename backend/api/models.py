@@ -0,0 +1,27 @@
+from django.db import models
+
+
+class StartupFingerprint(models.Model):
+    name = models.CharField(
+        max_length=64,
+        unique=True,
+        verbose_name="Этап",
+        help_text="Этап запуска, для которого сохранен отпечаток",
+    )
+    value = models.CharField(
+        max_length=64,
+        verbose_name="Отпечаток",
+        help_text="Хеш входных данных этапа",
+    )
+    updated = models.DateTimeField(
+        auto_now=True,
+        verbose_name="Дата обновления",
+        help_text="Когда этап выполнялся последний раз",
+    )
+
+    class Meta:
+        verbose_name = "Отпечаток запуска"
+        verbose_name_plural = "Отпечатки запуска"
+
+    def __str__(self):
+        return f"{self.name}: {self.value[:12]}"
@@ -0,0 +1,144 @@
+import os
+import re
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from .metrics import dump, load_all, view_name
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%s|\?")
+_IN_LIST = re.compile(r"\bIN \(\?(?:, \?)*\)", re.IGNORECASE)
+_VALUES = re.compile(r"(\(\?(?:, \?)*\))(?:, \(\?(?:, \?)*\))+")
+_SPACES = re.compile(r"\s+")
+
+# Обертки и middleware не считаются местом вызова: запрос, выполненный внутри
+# DRF или djoser, помечается только представлением.
+_WRAPPERS = {
+    os.path.join(os.path.dirname(__file__), name)
+    for name in ("slow_queries.py", "metrics.py")
+}
+
+_lock = threading.Lock()
+# {минута: {(отпечаток, представление, место вызова):
+#     [число, сумма мс, макс мс]}}
+_buckets = defaultdict(dict)
+_state = {"pid": os.getpid(), "flushed": time.monotonic()}
+
+
+def fingerprint(sql):
+    """SQL без значений: запросы, отличающиеся параметрами, совпадают."""
+    sql = _STRING.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _PLACEHOLDER.sub("?", sql)
+    sql = _VALUES.sub(r"\1, ...", sql)
+    sql = _IN_LIST.sub("IN (...)", sql)
+    return _SPACES.sub(" ", sql).strip()
+
+
+def call_site():
+    """Ближайший к запросу кадр кода проекта: файл, строка и функция."""
+    root = str(settings.BASE_DIR)
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if (
+            filename.startswith(root)
+            and "site-packages" not in filename
+            and filename not in _WRAPPERS
+            and not filename.endswith("middleware.py")
+        ):
+            path = os.path.relpath(filename, root)
+            return f"{path}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return "unknown"
+
+
+def record(sql, duration_ms, view, site):
+    minute = int(time.time() // 60)
+    key = (fingerprint(sql), view, site)
+    with _lock:
+        if _state["pid"] != os.getpid():
+            _buckets.clear()
+            _state["pid"] = os.getpid()
+        entry = _buckets[minute].get(key)
+        if entry is None:
+            entry = _buckets[minute][key] = [0, 0.0, 0.0]
+        entry[0] += 1
+        entry[1] += duration_ms
+        entry[2] = max(entry[2], duration_ms)
+
+
+def flush(force=False):
+    """Сохраняет окно последних минут процесса в его файл."""
+    now = time.monotonic()
+    if not force and now - _state["flushed"] < settings.METRICS_FLUSH_INTERVAL:
+        return
+    oldest = int(time.time() // 60) - settings.SLOW_QUERY_WINDOW_MINUTES
+    with _lock:
+        _state["flushed"] = now
+        for minute in [minute for minute in _buckets if minute <= oldest]:
+            del _buckets[minute]
+        data = [
+            [minute, *key, *entry]
+            for minute, entries in _buckets.items()
+            for key, entry in entries.items()
+        ]
+    dump(settings.SLOW_QUERY_DIR, data)
+
+
+def collect(minutes):
+    """Записи всех процессов за последние minutes минут."""
+    # Свой файл пишем, только если процесс что-то записал: команда
+    # slow_queries не должна оставлять пустой файл при каждом запуске.
+    if _buckets:
+        flush(force=True)
+    oldest = int(time.time() // 60) - minutes
+    for data in load_all(settings.SLOW_QUERY_DIR):
+        for minute, sql, view, site, count, total, longest in data:
+            if minute > oldest:
+                yield sql, view, site, count, total, longest
+
+
+class SlowQueryRecorder:
+    """execute_wrapper, записывающий запросы дольше SLOW_QUERY_THRESHOLD_MS."""
+
+    def __init__(self, request):
+        self.request = request
+        self.threshold = settings.SLOW_QUERY_THRESHOLD_MS
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration_ms = (time.perf_counter() - started) * 1000
+            if duration_ms >= self.threshold:
+                record(sql, duration_ms, view_name(self.request), call_site())
+
+
+class SlowQueryMiddleware:
+    """Журнал медленных запросов; отключен, если порог не задан."""
+
+    def __init__(self, get_response):
+        if not settings.SLOW_QUERY_THRESHOLD_MS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = SlowQueryRecorder(request)
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(
+                    connections[alias].execute_wrapper(recorder)
+                )
+            response = self.get_response(request)
+        flush()
+        return response
@@ -0,0 +1,98 @@
+import os
+import random
+import sqlite3
+import threading
+import time
+
+from django.conf import settings
+from rest_framework.throttling import AnonRateThrottle, UserRateThrottle
+
+from . import metrics
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS buckets (
+    key TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated REAL NOT NULL,
+    allowed INTEGER NOT NULL
+) WITHOUT ROWID
+"""
+
+# Токен-бакет за одну атомарную операцию: SQLite вычисляет все выражения
+# SET по старой версии строки, поэтому пополнение, списание и решение
+# принимаются согласованно даже при конкуренции воркеров.
+TAKE = """
+INSERT INTO buckets (key, tokens, updated, allowed)
+VALUES (:key, :capacity - 1, :now, 1)
+ON CONFLICT (key) DO UPDATE SET
+    tokens = min(:capacity, tokens + (:now - updated) * :rate)
+        - (min(:capacity, tokens + (:now - updated) * :rate) >= 1),
+    updated = :now,
+    allowed = min(:capacity, tokens + (:now - updated) * :rate) >= 1
+RETURNING allowed, tokens
+"""
+
+CLEANUP = "DELETE FROM buckets WHERE updated < ?"
+CLEANUP_PROBABILITY = 0.001
+BUCKET_MAX_IDLE = 24 * 60 * 60
+
+_local = threading.local()
+
+
+def _connection():
+    # Соединение SQLite нельзя переносить через fork и между потоками.
+    connection = getattr(_local, "connection", None)
+    if connection is None or _local.pid != os.getpid():
+        connection = sqlite3.connect(
+            settings.THROTTLE_DB_PATH, timeout=5, isolation_level=None
+        )
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute(SCHEMA)
+        _local.connection = connection
+        _local.pid = os.getpid()
+    return connection
+
+
+def take_token(key, capacity, rate):
+    """Списывает токен; возвращает (разрешено, остаток токенов)."""
+    now = time.time()
+    connection = _connection()
+    allowed, tokens = connection.execute(
+        TAKE, {"key": key, "capacity": capacity, "rate": rate, "now": now}
+    ).fetchone()
+    if random.random() < CLEANUP_PROBABILITY:
+        connection.execute(CLEANUP, (now - BUCKET_MAX_IDLE,))
+    return bool(allowed), tokens
+
+
+class SharedRateThrottleMixin:
+    """Лимит, общий для всех воркеров, вместо списков меток в кеше."""
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+        rate = self.num_requests / self.duration
+        allowed, tokens = take_token(self.key, self.num_requests, rate)
+        self._wait = 0 if allowed else (1 - tokens) / rate
+        if not allowed:
+            metrics.inc(
+                "foodgram_throttle_rejections_total",
+                scope=self.scope,
+                view=metrics.view_name(request),
+            )
+        return allowed
+
+    def wait(self):
+        return self._wait
+
+
+class AnonSharedRateThrottle(SharedRateThrottleMixin, AnonRateThrottle):
+    pass
+
+
+class UserSharedRateThrottle(SharedRateThrottleMixin, UserRateThrottle):
+    pass
@@ -0,0 +1,18 @@
+import hmac
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+
+from .metrics import render
+
+
+def metrics(request):
+    """Метрики всех процессов в формате Prometheus."""
+    token = settings.METRICS_TOKEN
+    if token and not hmac.compare_digest(
+        request.META.get("HTTP_AUTHORIZATION", ""), f"Bearer {token}"
+    ):
+        return HttpResponseForbidden()
+    return HttpResponse(
+        render(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
@@ -0,0 +1,100 @@
+import os
+import random
+import sqlite3
+import threading
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+
+_replica_reads = ContextVar("replica_reads", default=False)
+
+# Метки чтения с основной базы хранятся в SQLite-файле, общем для всех
+# воркеров: кеш Django по умолчанию живет внутри одного процесса.
+PIN_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pins (
+    user_id INTEGER PRIMARY KEY,
+    until REAL NOT NULL
+)
+"""
+PIN = """
+INSERT INTO pins (user_id, until) VALUES (?, ?)
+ON CONFLICT (user_id) DO UPDATE SET until = excluded.until
+"""
+PIN_CLEANUP = "DELETE FROM pins WHERE until < ?"
+PIN_CLEANUP_PROBABILITY = 0.01
+
+_local = threading.local()
+
+
+def replica_aliases():
+    return [
+        alias for alias in settings.DATABASES if alias.startswith("replica_")
+    ]
+
+
+def use_replica(enabled):
+    return _replica_reads.set(enabled)
+
+
+def reset_replica(token):
+    _replica_reads.reset(token)
+
+
+def _pins():
+    # Соединение SQLite нельзя переносить через fork и между потоками.
+    connection = getattr(_local, "connection", None)
+    if connection is None or _local.pid != os.getpid():
+        connection = sqlite3.connect(
+            settings.DB_REPLICA_PIN_PATH, timeout=5, isolation_level=None
+        )
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute(PIN_SCHEMA)
+        _local.connection = connection
+        _local.pid = os.getpid()
+    return connection
+
+
+def pin_to_primary(user):
+    """После записи читаем свои данные с основной базы некоторое время."""
+    if not replica_aliases():
+        return
+    now = time.time()
+    connection = _pins()
+    connection.execute(
+        PIN, (user.pk, now + settings.DB_REPLICA_STICKY_SECONDS)
+    )
+    if random.random() < PIN_CLEANUP_PROBABILITY:
+        connection.execute(PIN_CLEANUP, (now,))
+
+
+def is_pinned(user):
+    if not user.is_authenticated or not replica_aliases():
+        return False
+    row = (
+        _pins()
+        .execute("SELECT until FROM pins WHERE user_id = ?", (user.pk,))
+        .fetchone()
+    )
+    return row is not None and row[0] > time.time()
+
+
+class PrimaryReplicaRouter:
+    """Отправляет чтения на реплики только там, где это явно разрешено."""
+
+    def db_for_read(self, model, **hints):
+        if _replica_reads.get():
+            replicas = replica_aliases()
+            if replicas:
+                return random.choice(replicas)
+        return "default"
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return None
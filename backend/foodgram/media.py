@@ -0,0 +1,34 @@
+import mimetypes
+import posixpath
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def protected_media(request, path):
+    path = posixpath.normpath(path).lstrip("/")
+    try:
+        full_path = safe_join(
+            settings.MEDIA_ROOT, settings.PROTECTED_MEDIA_DIR, path
+        )
+    except SuspiciousFileOperation:
+        raise Http404
+    if settings.MEDIA_ACCEL_REDIRECT:
+        # Права проверены, сами байты отдаст nginx из internal-локации.
+        response = HttpResponse(
+            content_type=mimetypes.guess_type(path)[0] or ""
+        )
+        response["X-Accel-Redirect"] = (
+            settings.PROTECTED_MEDIA_INTERNAL_URL + path
+        )
+        return response
+    try:
+        return FileResponse(open(full_path, "rb"))
+    except (FileNotFoundError, IsADirectoryError):
+        raise Http404
@@ -0,0 +1,89 @@
+import os
+import threading
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.postgresql import base
+
+if base.is_psycopg3:
+    raise ImproperlyConfigured(
+        "Пул соединений поддерживается только для psycopg2"
+    )
+
+import psycopg2.extras  # noqa: E402
+from psycopg2.pool import ThreadedConnectionPool  # noqa: E402
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """PostgreSQL с пулом соединений внутри процесса.
+
+    Django по-прежнему закрывает соединение в конце запроса, но вместо
+    разрыва TCP-сессии оно возвращается в пул и переиспользуется.
+    """
+
+    def _get_pool(self, conn_params):
+        # После fork (gunicorn --preload) пул родителя использовать нельзя.
+        key = (self.alias, os.getpid())
+        pool = _pools.get(key)
+        if pool is None:
+            with _pools_lock:
+                pool = _pools.get(key)
+                if pool is None:
+                    options = self.settings_dict.get("POOL", {})
+                    pool = ThreadedConnectionPool(
+                        options.get("MIN_SIZE", 1),
+                        options.get("MAX_SIZE", 10),
+                        **conn_params,
+                    )
+                    _pools[key] = pool
+        return pool
+
+    def _is_alive(self, connection):
+        if connection.closed:
+            return False
+        if not self.settings_dict["CONN_HEALTH_CHECKS"]:
+            return True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            connection.rollback()
+        except psycopg2.Error:
+            return False
+        return True
+
+    def get_new_connection(self, conn_params):
+        pool = self._get_pool(conn_params)
+        connection = pool.getconn()
+        if not self._is_alive(connection):
+            pool.putconn(connection, close=True)
+            connection = pool.getconn()
+        options = self.settings_dict["OPTIONS"]
+        self.isolation_level = base.IsolationLevel.READ_COMMITTED
+        if "isolation_level" in options:
+            try:
+                self.isolation_level = base.IsolationLevel(
+                    options["isolation_level"]
+                )
+            except ValueError:
+                raise ImproperlyConfigured(
+                    f"Invalid transaction isolation level "
+                    f"{options['isolation_level']} specified."
+                )
+            connection.isolation_level = self.isolation_level
+        psycopg2.extras.register_default_jsonb(
+            conn_or_curs=connection, loads=lambda x: x
+        )
+        return connection
+
+    def _close(self):
+        if self.connection is None:
+            return None
+        pool = _pools.get((self.alias, os.getpid()))
+        with self.wrap_database_errors:
+            if pool is None:
+                return self.connection.close()
+            return pool.putconn(
+                self.connection, close=bool(self.connection.closed)
+            )
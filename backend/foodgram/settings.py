@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
 import os
+import tempfile
 from pathlib import Path
 from datetime import timedelta
 
@@ -33,7 +34,7 @@ SECRET_KEY = os.getenv(
 )
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = os.getenv("DEBUG", "True").lower() == "true"
 
 ALLOWED_HOSTS = os.getenv("ALLOWED_HOSTS", "localhost,127.0.0.1").split(",")
 
@@ -64,17 +65,24 @@ LOCAL_APPS = [
     "recipe.apps.RecipeConfig",
     "users.apps.UsersConfig",
     "ingredient.apps.IngredientConfig",
+    "jobs.apps.JobsConfig",
+    "outbox.apps.OutboxConfig",
 ]
 
 INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 
 MIDDLEWARE = [
+    "api.metrics.MetricsMiddleware",
+    "api.compression.CompressionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
+    "outbox.middleware.OutboxMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "api.middleware.ProfilingMiddleware",
+    "api.slow_queries.SlowQueryMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -107,17 +115,58 @@ WSGI_APPLICATION = "foodgram.wsgi.application"
 
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
+# DB_POOL=True включает пул соединений внутри процесса (только PostgreSQL):
+# соединение возвращается в пул в конце запроса, поэтому его стоит
+# сочетать с DB_CONN_MAX_AGE=0. Без пула DB_CONN_MAX_AGE держит соединение
+# открытым между запросами, а DB_CONN_HEALTH_CHECKS проверяет его перед
+# повторным использованием.
+DB_POOL = os.getenv("DB_POOL", "False").lower() == "true"
+
 DATABASES = {
     "default": {
-        "ENGINE": os.getenv("DB_ENGINE", "django.db.backends.postgresql"),
+        "ENGINE": (
+            "foodgram.postgresql_pool"
+            if DB_POOL
+            else os.getenv("DB_ENGINE", "django.db.backends.postgresql")
+        ),
         "NAME": os.getenv("DB_NAME", "postgres"),
         "USER": os.getenv("POSTGRES_USER", "postgres"),
         "PASSWORD": os.getenv("POSTGRES_PASSWORD", "postgres"),
         "HOST": os.getenv("DB_HOST", "db"),
         "PORT": os.getenv("DB_PORT", "5432"),
+        "CONN_MAX_AGE": int(os.getenv("DB_CONN_MAX_AGE", "60")),
+        "CONN_HEALTH_CHECKS": (
+            os.getenv("DB_CONN_HEALTH_CHECKS", "True").lower() == "true"
+        ),
+        "POOL": {
+            "MIN_SIZE": int(os.getenv("DB_POOL_MIN_SIZE", "1")),
+            "MAX_SIZE": int(os.getenv("DB_POOL_MAX_SIZE", "10")),
+        },
     }
 }
 
+# Реплики для чтения: DB_REPLICAS — список хостов через запятую
+# (для SQLite — список файлов, удобно для локальной проверки).
+# После записи чтения пользователя идут в основную базу
+# DB_REPLICA_STICKY_SECONDS секунд.
+DB_REPLICA_STICKY_SECONDS = int(os.getenv("DB_REPLICA_STICKY_SECONDS", "5"))
+# Файл SQLite с метками «читать с основной базы», общий для всех воркеров
+DB_REPLICA_PIN_PATH = os.getenv(
+    "DB_REPLICA_PIN_PATH", os.path.join(tempfile.gettempdir(), "foodgram-pins.sqlite3")
+)
+
+for number, replica in enumerate(
+    filter(None, os.getenv("DB_REPLICAS", "").split(",")), start=1
+):
+    target = "NAME" if "sqlite" in DATABASES["default"]["ENGINE"] else "HOST"
+    DATABASES[f"replica_{number}"] = {
+        **DATABASES["default"],
+        target: replica.strip(),
+        "TEST": {"MIRROR": "default"},
+    }
+
+DATABASE_ROUTERS = ["foodgram.db_router.PrimaryReplicaRouter"]
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -162,6 +211,15 @@ STATICFILES_DIRS = []
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Загрузки получают имена с хешем содержимого и кешируются навсегда.
+DEFAULT_FILE_STORAGE = "foodgram.storage.HashedFileSystemStorage"
+
+# Файлы из MEDIA_ROOT/protected/ отдаются только после проверки прав.
+# В продакшене Django лишь отвечает X-Accel-Redirect, а байты отдает nginx.
+PROTECTED_MEDIA_DIR = "protected"
+PROTECTED_MEDIA_INTERNAL_URL = "/protected-media/"
+MEDIA_ACCEL_REDIRECT = os.getenv("MEDIA_ACCEL_REDIRECT", "False").lower() == "true"
+
 # Отключаем ManifestStaticFilesStorage для отладки проблем со статикой
 STATICFILES_STORAGE = "django.contrib.staticfiles.storage.StaticFilesStorage"
 
@@ -173,7 +231,7 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework.authentication.TokenAuthentication",
+        "users.authentication.CachedTokenAuthentication",
     ],
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticatedOrReadOnly",
@@ -184,8 +242,8 @@ REST_FRAMEWORK = {
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.LimitOffsetPagination",
     "PAGE_SIZE": 6,
     "DEFAULT_THROTTLE_CLASSES": [
-        "rest_framework.throttling.AnonRateThrottle",
-        "rest_framework.throttling.UserRateThrottle",
+        "api.throttling.AnonSharedRateThrottle",
+        "api.throttling.UserSharedRateThrottle",
     ],
     "DEFAULT_THROTTLE_RATES": {"anon": "100/hour", "user": "1000/hour"},
 }
@@ -226,6 +284,81 @@ CACHES = {
     }
 }
 
+# Профилирование запросов: сотрудники с заголовком X-Profile и случайная доля
+# PROFILING_SAMPLE_RATE всех запросов. Отчеты пишутся в PROFILING_DIR.
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "False").lower() == "true"
+PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", "0"))
+PROFILING_DIR = os.getenv("PROFILING_DIR", str(BASE_DIR / "profiles"))
+
+# Метрики: каждый процесс пишет свой файл, /metrics складывает их при чтении
+METRICS_DIR = os.getenv(
+    "METRICS_DIR", os.path.join(tempfile.gettempdir(), "foodgram-metrics")
+)
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", "5"))
+# Если задан, /metrics требует заголовок Authorization: Bearer <токен>
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+# Сжатие ответов (brotli, если установлен пакет Brotli, иначе gzip)
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "True").lower() == "true"
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "5"))
+COMPRESSION_CACHE_SIZE = int(os.getenv("COMPRESSION_CACHE_SIZE", "256"))
+COMPRESSION_CACHE_TIMEOUT = int(os.getenv("COMPRESSION_CACHE_TIMEOUT", "300"))
+
+# Журнал медленных запросов (python manage.py slow_queries); 0 — выключен
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "0"))
+SLOW_QUERY_WINDOW_MINUTES = int(os.getenv("SLOW_QUERY_WINDOW_MINUTES", "60"))
+SLOW_QUERY_DIR = os.getenv(
+    "SLOW_QUERY_DIR", os.path.join(tempfile.gettempdir(), "foodgram-slow-queries")
+)
+
+# Фоновые задачи (python manage.py run_jobs)
+JOBS_RUN_EAGERLY = os.getenv("JOBS_RUN_EAGERLY", "False").lower() == "true"
+JOBS_WORKER_THREADS = int(os.getenv("JOBS_WORKER_THREADS", "4"))
+JOBS_POLL_INTERVAL = float(os.getenv("JOBS_POLL_INTERVAL", "1"))
+JOBS_MAX_ATTEMPTS = int(os.getenv("JOBS_MAX_ATTEMPTS", "5"))
+JOBS_RETRY_BASE_DELAY = 5
+JOBS_RETRY_MAX_DELAY = 3600
+# Через сколько секунд задача упавшего воркера снова становится доступной
+JOBS_LOCK_TIMEOUT = int(os.getenv("JOBS_LOCK_TIMEOUT", "600"))
+
+# Межпроцессный сброс локальных кешей через таблицу событий изменений
+OUTBOX_POLL_INTERVAL = float(os.getenv("OUTBOX_POLL_INTERVAL", "1"))
+# Сколько секунд ждать коммита транзакции с пропущенным id события
+OUTBOX_GAP_TIMEOUT = 30
+OUTBOX_RETENTION = int(os.getenv("OUTBOX_RETENTION", str(24 * 60 * 60)))
+# Как часто воркер удаляет старые события (в секундах)
+OUTBOX_PRUNE_INTERVAL = int(os.getenv("OUTBOX_PRUNE_INTERVAL", "3600"))
+
+# Сколько секунд хранить общую для всех пользователей часть рецепта
+RECIPE_FRAGMENT_TIMEOUT = int(os.getenv("RECIPE_FRAGMENT_TIMEOUT", "3600"))
+# Читать ингредиенты из Recipe.ingredients_snapshot вместо JOIN по составу
+RECIPE_INGREDIENT_SNAPSHOTS = (
+    os.getenv("RECIPE_INGREDIENT_SNAPSHOTS", "True").lower() == "true"
+)
+
+# Период полураспада очков популярности рецептов (в днях)
+POPULARITY_HALF_LIFE_DAYS = float(os.getenv("POPULARITY_HALF_LIFE_DAYS", "7"))
+# Как часто воркер пересчитывает рейтинг (в секундах)
+POPULARITY_RECOMPUTE_INTERVAL = int(
+    os.getenv("POPULARITY_RECOMPUTE_INTERVAL", "300")
+)
+
+# Каталог для файловых индексов рецептов (похожие рецепты и т.п.)
+RECIPE_INDEX_DIR = os.getenv("RECIPE_INDEX_DIR", str(BASE_DIR / "indexes"))
+
+# Файл SQLite с общими для всех воркеров счетчиками ограничения запросов
+THROTTLE_DB_PATH = os.getenv(
+    "THROTTLE_DB_PATH", os.path.join(tempfile.gettempdir(), "foodgram-throttle.sqlite3")
+)
+
+# Кеш токенов авторизации: кеш Django (CACHES) и LRU внутри процесса
+# (секунды, записи)
+TOKEN_CACHE_TIMEOUT = int(os.getenv("TOKEN_CACHE_TIMEOUT", "300"))
+TOKEN_CACHE_LOCAL_TIMEOUT = int(os.getenv("TOKEN_CACHE_LOCAL_TIMEOUT", "10"))
+TOKEN_CACHE_LOCAL_SIZE = int(os.getenv("TOKEN_CACHE_LOCAL_SIZE", "10000"))
+
 # Настройки CORS
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
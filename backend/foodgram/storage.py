@@ -0,0 +1,26 @@
+import hashlib
+import os
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+
+
+class HashedFileSystemStorage(FileSystemStorage):
+    """Добавляет к имени загруженного файла хеш содержимого.
+
+    Файл с таким именем больше никогда не меняется, поэтому nginx может
+    отдавать медиа с Cache-Control: immutable.
+    """
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, "chunks"):
+            content = File(content, name)
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+        root, ext = os.path.splitext(name)
+        name = f"{root}.{digest.hexdigest()[:16]}{ext.lower()}"
+        return super().save(name, content, max_length)
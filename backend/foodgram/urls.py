@@ -3,7 +3,17 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
+from api.views import metrics
+from .media import protected_media
+
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/", include("api.urls")),
+    path("metrics", metrics, name="metrics"),
+    path(
+        f"{settings.MEDIA_URL.lstrip('/')}{settings.PROTECTED_MEDIA_DIR}/"
+        "<path:path>",
+        protected_media,
+        name="protected-media",
+    ),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
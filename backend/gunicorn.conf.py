@@ -0,0 +1,43 @@
+import gc
+import os
+import time
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+# Каждый воркер держит свои соединения с базой, поэтому число воркеров
+# задается явно вместе с бюджетом соединений (см. infra/docker-compose.yml).
+workers = int(os.getenv("GUNICORN_WORKERS", "1"))
+threads = int(os.getenv("GUNICORN_THREADS", "1"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "30"))
+# Приложение импортируется один раз в мастере и разделяется воркерами
+# через copy-on-write.
+preload_app = True
+
+
+def when_ready(server):
+    started = os.getenv("STARTUP_STARTED_AT")
+    if started:
+        server.log.info(
+            "app preload done in %.3fs", time.time() - float(started)
+        )
+    # Объекты, созданные при импорте, переносим в постоянное поколение:
+    # сборщик мусора не будет их трогать и ломать общие страницы памяти.
+    gc.collect()
+    gc.freeze()
+    # Файлы метрик и медленных запросов прошлого запуска: их процессов уже
+    # нет, счетчики начинаются заново.
+    from django.conf import settings
+
+    for directory in (settings.METRICS_DIR, settings.SLOW_QUERY_DIR):
+        if os.path.isdir(directory):
+            for entry in os.listdir(directory):
+                os.remove(os.path.join(directory, entry))
+
+
+def pre_fork(server, worker):
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    from django.db import connections
+
+    connections.close_all()
@@ -1,3 +1,17 @@
 from django.contrib import admin
 
-# Register your models here.
+from api.admin import LargeTableAdmin
+from .models import Ingredient, UnitConversion
+
+
+@admin.register(Ingredient)
+class IngredientAdmin(LargeTableAdmin):
+    list_display = ("id", "name", "measurement_unit")
+    search_fields = ("^name",)
+    list_filter = ("measurement_unit",)
+
+
+@admin.register(UnitConversion)
+class UnitConversionAdmin(admin.ModelAdmin):
+    list_display = ("unit", "canonical_unit", "factor", "is_display_unit")
+    list_editable = ("canonical_unit", "factor", "is_display_unit")
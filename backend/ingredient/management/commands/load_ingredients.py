@@ -1,20 +1,30 @@
 import json
+
+from django.conf import settings
 from django.core.management.base import BaseCommand
 from ingredient.models import Ingredient
 
+INGREDIENTS_FILE = settings.BASE_DIR / "data" / "ingredients.json"
+
 
 class Command(BaseCommand):
     help = "Load ingredients from JSON file"
 
     def handle(self, *args, **options):
         try:
-            with open("data/ingredients.json", "r", encoding="utf-8") as file:
+            with open(INGREDIENTS_FILE, "r", encoding="utf-8") as file:
                 ingredients = json.load(file)
-                for ingredient in ingredients:
-                    Ingredient.objects.get_or_create(
-                        name=ingredient["name"],
-                        measurement_unit=ingredient["measurement_unit"],
-                    )
+                Ingredient.objects.bulk_create(
+                    [
+                        Ingredient(
+                            name=ingredient["name"],
+                            measurement_unit=ingredient["measurement_unit"],
+                        )
+                        for ingredient in ingredients
+                    ],
+                    batch_size=1000,
+                    ignore_conflicts=True,
+                )
                 self.stdout.write(self.style.SUCCESS("Successfully loaded ingredients"))
         except FileNotFoundError:
             self.stdout.write(self.style.ERROR("ingredients.json file not found"))
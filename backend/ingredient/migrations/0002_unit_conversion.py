@@ -0,0 +1,93 @@
+# Generated by Django 4.2.21 on 2026-10-19 09:40
+
+from django.db import migrations, models
+
+CONVERSIONS = [
+    ("мг", "г", 0.001, False),
+    ("г", "г", 1, True),
+    ("кг", "г", 1000, True),
+    ("капля", "мл", 0.05, False),
+    ("ч. л.", "мл", 5, False),
+    ("ст. л.", "мл", 15, False),
+    ("стакан", "мл", 200, False),
+    ("мл", "мл", 1, True),
+    ("л", "мл", 1000, True),
+]
+
+
+def load_conversions(apps, schema_editor):
+    UnitConversion = apps.get_model("ingredient", "UnitConversion")
+    UnitConversion.objects.bulk_create(
+        [
+            UnitConversion(
+                unit=unit,
+                canonical_unit=canonical_unit,
+                factor=factor,
+                is_display_unit=is_display_unit,
+            )
+            for unit, canonical_unit, factor, is_display_unit in CONVERSIONS
+        ],
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ingredient", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UnitConversion",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "unit",
+                    models.CharField(
+                        help_text="Единица измерения ингредиента",
+                        max_length=20,
+                        unique=True,
+                        verbose_name="Единица измерения",
+                    ),
+                ),
+                (
+                    "canonical_unit",
+                    models.CharField(
+                        help_text="Единица, к которой приводятся количества",
+                        max_length=20,
+                        verbose_name="Базовая единица",
+                    ),
+                ),
+                (
+                    "factor",
+                    models.FloatField(
+                        help_text="Сколько базовых единиц в одной единице измерения",
+                        verbose_name="Множитель",
+                    ),
+                ),
+                (
+                    "is_display_unit",
+                    models.BooleanField(
+                        default=False,
+                        help_text="Можно ли выводить итоговые количества в этой единице",
+                        verbose_name="Для отображения",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Перевод единиц",
+                "verbose_name_plural": "Переводы единиц",
+                "ordering": ["canonical_unit", "factor"],
+            },
+        ),
+        migrations.RunPython(load_conversions, migrations.RunPython.noop),
+    ]
@@ -26,3 +26,34 @@ class Ingredient(models.Model):
 
     def __str__(self):
         return f"{self.name} ({self.measurement_unit})"
+
+
+class UnitConversion(models.Model):
+    unit = models.CharField(
+        max_length=20,
+        unique=True,
+        verbose_name="Единица измерения",
+        help_text="Единица измерения ингредиента",
+    )
+    canonical_unit = models.CharField(
+        max_length=20,
+        verbose_name="Базовая единица",
+        help_text="Единица, к которой приводятся количества",
+    )
+    factor = models.FloatField(
+        verbose_name="Множитель",
+        help_text="Сколько базовых единиц в одной единице измерения",
+    )
+    is_display_unit = models.BooleanField(
+        default=False,
+        verbose_name="Для отображения",
+        help_text="Можно ли выводить итоговые количества в этой единице",
+    )
+
+    class Meta:
+        verbose_name = "Перевод единиц"
+        verbose_name_plural = "Переводы единиц"
+        ordering = ["canonical_unit", "factor"]
+
+    def __str__(self):
+        return f"1 {self.unit} = {self.factor:g} {self.canonical_unit}"
@@ -0,0 +1,33 @@
+from collections import defaultdict
+
+from .models import UnitConversion
+
+
+def conversions(units):
+    """Возвращает {единица: (базовая единица, множитель)} для списка единиц."""
+    found = {
+        unit: (canonical_unit, factor)
+        for unit, canonical_unit, factor in UnitConversion.objects.filter(
+            unit__in=set(units)
+        ).values_list("unit", "canonical_unit", "factor")
+    }
+    return {unit: found.get(unit, (unit, 1.0)) for unit in units}
+
+
+def display_units():
+    units = defaultdict(list)
+    for unit, canonical_unit, factor in UnitConversion.objects.filter(
+        is_display_unit=True
+    ).values_list("unit", "canonical_unit", "factor"):
+        units[canonical_unit].append((factor, unit))
+    for options in units.values():
+        options.sort(reverse=True)
+    return units
+
+
+def humanize(amount, canonical_unit, units):
+    """Переводит количество в самую крупную подходящую единицу."""
+    for factor, unit in units.get(canonical_unit, ()):
+        if amount >= factor:
+            return f"{round(amount / factor, 2):g}", unit
+    return f"{round(amount, 2):g}", canonical_unit
@@ -0,0 +1,12 @@
+from django.contrib import admin
+
+from api.admin import LargeTableAdmin
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(LargeTableAdmin):
+    list_display = ("id", "name", "status", "attempts", "run_at", "locked_by")
+    list_filter = ("status",)
+    search_fields = ("^name",)
+    readonly_fields = ("locked_at", "locked_by", "last_error", "created")
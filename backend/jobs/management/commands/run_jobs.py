@@ -0,0 +1,103 @@
+import multiprocessing
+import signal
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection, connections
+
+from jobs.queue import claim, run, schedule_periodic, worker_id
+
+
+class Command(BaseCommand):
+    help = (
+        "Run background jobs from the database queue with a pool of "
+        "threads, optionally in several processes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--threads", type=int, default=settings.JOBS_WORKER_THREADS
+        )
+        parser.add_argument("--processes", type=int, default=1)
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=settings.JOBS_POLL_INTERVAL,
+            help="Seconds to sleep when the queue is empty",
+        )
+        parser.add_argument(
+            "--burst",
+            action="store_true",
+            help="Exit once the queue is empty instead of polling",
+        )
+
+    def handle(self, *args, **options):
+        for job in schedule_periodic():
+            self.stdout.write(f"Scheduled periodic job {job.name}")
+        processes = max(1, options["processes"])
+        if processes == 1:
+            self._serve(options)
+            return
+        # Дочерние процессы не должны делить соединения родителя.
+        connections.close_all()
+        context = multiprocessing.get_context("fork")
+        children = [
+            context.Process(target=self._serve, args=(options,))
+            for _ in range(processes)
+        ]
+        for child in children:
+            child.start()
+
+        def stop(signum, frame):
+            for child in children:
+                child.terminate()
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+        for child in children:
+            child.join()
+
+    def _serve(self, options):
+        stopping = threading.Event()
+
+        def stop(signum, frame):
+            stopping.set()
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+        threads = [
+            threading.Thread(
+                target=self._loop, args=(options, stopping), daemon=True
+            )
+            for _ in range(max(1, options["threads"]))
+        ]
+        for thread in threads:
+            thread.start()
+        # join с таймаутом, чтобы главный поток успевал обрабатывать сигналы.
+        while any(thread.is_alive() for thread in threads):
+            for thread in threads:
+                thread.join(timeout=0.5)
+
+    def _loop(self, options, stopping):
+        worker = worker_id()
+        try:
+            while not stopping.is_set():
+                close_old_connections()
+                jobs = claim(worker)
+                if not jobs:
+                    if options["burst"]:
+                        return
+                    stopping.wait(options["poll_interval"])
+                    continue
+                for job in jobs:
+                    if run(job):
+                        self.stdout.write(
+                            f"{worker}: {job.name} #{job.id} done"
+                        )
+                    else:
+                        self.stderr.write(
+                            f"{worker}: {job.name} #{job.id} failed"
+                        )
+        finally:
+            connection.close()
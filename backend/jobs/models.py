@@ -0,0 +1,79 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    PENDING = "pending"
+    RUNNING = "running"
+    FAILED = "failed"
+    STATUS_CHOICES = (
+        (PENDING, "Ожидает"),
+        (RUNNING, "Выполняется"),
+        (FAILED, "Ошибка"),
+    )
+
+    name = models.CharField(
+        max_length=128,
+        verbose_name="Задача",
+        help_text="Имя зарегистрированного обработчика",
+    )
+    payload = models.JSONField(
+        default=dict,
+        verbose_name="Аргументы",
+        help_text="Позиционные и именованные аргументы обработчика",
+    )
+    status = models.CharField(
+        max_length=16,
+        choices=STATUS_CHOICES,
+        default=PENDING,
+        verbose_name="Статус",
+        help_text="Состояние задачи",
+    )
+    attempts = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Попытки",
+        help_text="Сколько раз задача запускалась",
+    )
+    max_attempts = models.PositiveIntegerField(
+        default=5,
+        verbose_name="Максимум попыток",
+        help_text="После стольких неудач задача помечается ошибочной",
+    )
+    run_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name="Запустить после",
+        help_text="Не раньше какого момента выполнять задачу",
+    )
+    locked_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Взята в работу",
+        help_text="Когда воркер забрал задачу",
+    )
+    locked_by = models.CharField(
+        max_length=128,
+        blank=True,
+        verbose_name="Воркер",
+        help_text="Идентификатор воркера, выполняющего задачу",
+    )
+    last_error = models.TextField(
+        blank=True, verbose_name="Ошибка", help_text="Текст последней ошибки"
+    )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="Создана",
+        help_text="Дата постановки в очередь",
+    )
+
+    class Meta:
+        verbose_name = "Фоновая задача"
+        verbose_name_plural = "Фоновые задачи"
+        ordering = ["run_at"]
+        indexes = [
+            models.Index(
+                fields=["status", "run_at"], name="job_status_run_at_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
@@ -0,0 +1,196 @@
+import logging
+import os
+import random
+import socket
+import threading
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+_periodic = {}
+
+
+def task(name):
+    """Регистрирует функцию как обработчик задач с именем name."""
+
+    def decorator(func):
+        _registry[name] = func
+        return func
+
+    return decorator
+
+
+def periodic(name, interval):
+    """Регистрирует задачу name, повторяемую каждые interval секунд.
+
+    У такой задачи в очереди одна строка: после выполнения она не
+    удаляется, а откладывается на interval. Строку создает
+    schedule_periodic при запуске run_jobs.
+    """
+
+    def decorator(func):
+        _periodic[name] = interval
+        return task(name)(func)
+
+    return decorator
+
+
+def schedule_periodic():
+    """Ставит в очередь периодические задачи, которых в ней еще нет."""
+    if settings.JOBS_RUN_EAGERLY:
+        return []
+    existing = set(
+        Job.objects.filter(name__in=_periodic).values_list("name", flat=True)
+    )
+    return [
+        Job.objects.create(name=name, max_attempts=settings.JOBS_MAX_ATTEMPTS)
+        for name in _periodic
+        if name not in existing
+    ]
+
+
+def enqueue(name, *args, delay=0, max_attempts=None, **kwargs):
+    """Ставит задачу в очередь в текущей транзакции.
+
+    Воркер увидит задачу только после коммита, поэтому ее можно ставить из
+    представлений и сигналов вместе с изменением данных.
+    """
+    if name not in _registry:
+        raise KeyError(f"Неизвестная задача: {name}")
+    if settings.JOBS_RUN_EAGERLY:
+        transaction.on_commit(lambda: _registry[name](*args, **kwargs))
+        return None
+    return Job.objects.create(
+        name=name,
+        payload={"args": list(args), "kwargs": kwargs},
+        run_at=timezone.now() + timedelta(seconds=delay),
+        max_attempts=max_attempts or settings.JOBS_MAX_ATTEMPTS,
+    )
+
+
+def worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+
+
+def _ready():
+    return Job.objects.filter(
+        status=Job.PENDING, run_at__lte=timezone.now()
+    ).order_by("run_at")
+
+
+def _retry(job, attempts):
+    """Изменения строки после неудачной попытки номер attempts."""
+    now = timezone.now()
+    if attempts < job.max_attempts:
+        delay = timedelta(seconds=backoff(attempts))
+        return {"status": Job.PENDING, "run_at": now + delay}
+    interval = _periodic.get(job.name)
+    if interval is not None:
+        # Периодическая задача не выключается: следующий запуск по
+        # расписанию начинает попытки заново.
+        return {
+            "status": Job.PENDING,
+            "run_at": now + timedelta(seconds=interval),
+            "attempts": 0,
+        }
+    return {"status": Job.FAILED}
+
+
+def _release_stale():
+    """Возвращает в очередь задачи воркеров, переставших отвечать.
+
+    Потерянная задача считается неудачной попыткой: иначе задача, которая
+    роняет воркер, перезапускалась бы бесконечно и без задержки.
+    """
+    stale = timezone.now() - timedelta(seconds=settings.JOBS_LOCK_TIMEOUT)
+    for job in Job.objects.filter(status=Job.RUNNING, locked_at__lt=stale):
+        attempts = job.attempts + 1
+        changes = {
+            "attempts": attempts,
+            "last_error": (
+                f"Воркер {job.locked_by} не завершил задачу за "
+                f"{settings.JOBS_LOCK_TIMEOUT} с"
+            ),
+            "locked_at": None,
+            "locked_by": "",
+            **_retry(job, attempts),
+        }
+        # Условие по прежней блокировке: строку мог уже освободить другой
+        # воркер или завершивший работу владелец.
+        Job.objects.filter(
+            id=job.id, status=Job.RUNNING, locked_at=job.locked_at
+        ).update(**changes)
+
+
+def claim(worker, limit=1):
+    """Забирает до limit готовых задач и помечает их выполняемыми."""
+    _release_stale()
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            jobs = list(_ready().select_for_update(skip_locked=True)[:limit])
+            ids = [job.id for job in jobs]
+            Job.objects.filter(id__in=ids).update(
+                status=Job.RUNNING, locked_at=timezone.now(), locked_by=worker
+            )
+        return jobs
+    # SQLite блокирует всю базу на запись: забираем задачи оптимистично,
+    # условным UPDATE по прежнему состоянию строки.
+    claimed = []
+    for job in _ready()[: limit * 4]:
+        updated = Job.objects.filter(
+            id=job.id, status=Job.PENDING, run_at=job.run_at
+        ).update(
+            status=Job.RUNNING, locked_at=timezone.now(), locked_by=worker
+        )
+        if updated:
+            claimed.append(job)
+            if len(claimed) >= limit:
+                break
+    return claimed
+
+
+def backoff(attempts):
+    delay = settings.JOBS_RETRY_BASE_DELAY * 2 ** (attempts - 1)
+    delay = min(delay, settings.JOBS_RETRY_MAX_DELAY)
+    return delay * random.uniform(0.5, 1.0)
+
+
+def run(job):
+    """Выполняет задачу; успешные удаляются, неудачные откладываются.
+
+    Успешная периодическая задача откладывается до следующего запуска.
+    """
+    handler = _registry.get(job.name)
+    try:
+        if handler is None:
+            raise KeyError(f"Неизвестная задача: {job.name}")
+        handler(*job.payload.get("args", ()), **job.payload.get("kwargs", {}))
+    except Exception:
+        attempts = job.attempts + 1
+        error = traceback.format_exc()
+        logger.exception("Задача %s #%s завершилась ошибкой", job.name, job.id)
+        changes = {"attempts": attempts, **_retry(job, attempts)}
+        Job.objects.filter(id=job.id).update(
+            last_error=error, locked_at=None, locked_by="", **changes
+        )
+        return False
+    interval = _periodic.get(job.name)
+    if interval is None:
+        Job.objects.filter(id=job.id).delete()
+        return True
+    Job.objects.filter(id=job.id).update(
+        status=Job.PENDING,
+        run_at=timezone.now() + timedelta(seconds=interval),
+        attempts=0,
+        locked_at=None,
+        locked_by="",
+    )
+    return True
@@ -0,0 +1,106 @@
+import logging
+import threading
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import ChangeEvent
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 1000
+
+_handlers = defaultdict(list)
+_state = {"cursor": None, "checked": 0.0}
+_lock = threading.Lock()
+
+
+def on_change(topic):
+    """Регистрирует обработчик, сбрасывающий локальные кеши по ключам темы."""
+
+    def decorator(func):
+        _handlers[topic].append(func)
+        return func
+
+    return decorator
+
+
+def dispatch(topic, keys):
+    for handler in _handlers[topic]:
+        try:
+            handler(keys)
+        except Exception:
+            logger.exception("Ошибка обработчика изменений %s", topic)
+
+
+def record(topic, keys):
+    """Записывает события в текущей транзакции.
+
+    Свой процесс сбрасывает кеши сразу после коммита, остальные процессы
+    узнают об изменении, читая таблицу событий в consume().
+    """
+    keys = {str(key) for key in keys}
+    if not keys:
+        return
+    ChangeEvent.objects.bulk_create(
+        ChangeEvent(topic=topic, key=key) for key in keys
+    )
+    transaction.on_commit(lambda: dispatch(topic, keys))
+
+
+def _advance(cursor, events):
+    # id выдаются до коммита, поэтому событие с меньшим id может появиться
+    # позже большего. На свежем пропуске курсор останавливается, и события
+    # за ним будут прочитаны повторно (сброс кеша идемпотентен).
+    stale = timezone.now() - timedelta(seconds=settings.OUTBOX_GAP_TIMEOUT)
+    for event_id, _, _, created in events:
+        if event_id != cursor + 1 and created > stale:
+            break
+        cursor = event_id
+    return cursor
+
+
+def consume(force=False):
+    """Применяет новые события не чаще раза в OUTBOX_POLL_INTERVAL секунд."""
+    now = time.monotonic()
+    if not force and now - _state["checked"] < settings.OUTBOX_POLL_INTERVAL:
+        return 0
+    if not _lock.acquire(blocking=False):
+        return 0
+    try:
+        _state["checked"] = now
+        cursor = _state["cursor"]
+        if cursor is None:
+            # Кеши нового процесса пусты: прошлые события не нужны.
+            _state["cursor"] = (
+                ChangeEvent.objects.aggregate(Max("id"))["id__max"] or 0
+            )
+            return 0
+        events = list(
+            ChangeEvent.objects.filter(id__gt=cursor)
+            .order_by("id")
+            .values_list("id", "topic", "key", "created")[:BATCH_SIZE]
+        )
+        grouped = defaultdict(set)
+        for _, topic, key, _ in events:
+            grouped[topic].add(key)
+        for topic, keys in grouped.items():
+            dispatch(topic, keys)
+        _state["cursor"] = _advance(cursor, events)
+        return len(events)
+    finally:
+        _lock.release()
+
+
+def prune(older_than=None):
+    """Удаляет события старше older_than секунд; возвращает их число."""
+    if older_than is None:
+        older_than = settings.OUTBOX_RETENTION
+    threshold = timezone.now() - timedelta(seconds=older_than)
+    deleted, _ = ChangeEvent.objects.filter(created__lt=threshold).delete()
+    return deleted
@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from outbox.events import prune
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete change events older than the retention period. The job "
+        "worker also does this every OUTBOX_PRUNE_INTERVAL seconds."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than",
+            type=int,
+            default=settings.OUTBOX_RETENTION,
+            help="Age in seconds of the events to delete",
+        )
+
+    def handle(self, *args, **options):
+        deleted = prune(options["older_than"])
+        self.stdout.write(f"Deleted {deleted} change events")
@@ -0,0 +1,12 @@
+from .events import consume
+
+
+class OutboxMiddleware:
+    """Сбрасывает кеши, устаревшие из-за записей в других процессах."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        consume()
+        return self.get_response(request)
@@ -0,0 +1,54 @@
+# Generated by Django 4.2.21 on 2026-10-19 09:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="ChangeEvent",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "topic",
+                    models.CharField(
+                        help_text="Вид измененного объекта: recipe, ingredient, user и т.п.",
+                        max_length=32,
+                        verbose_name="Тема",
+                    ),
+                ),
+                (
+                    "key",
+                    models.CharField(
+                        help_text="Идентификатор измененного объекта",
+                        max_length=64,
+                        verbose_name="Ключ",
+                    ),
+                ),
+                (
+                    "created",
+                    models.DateTimeField(
+                        auto_now_add=True, db_index=True, verbose_name="Дата изменения"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Событие изменения",
+                "verbose_name_plural": "События изменений",
+                "ordering": ["id"],
+            },
+        ),
+    ]
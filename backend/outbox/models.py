@@ -0,0 +1,25 @@
+from django.db import models
+
+
+class ChangeEvent(models.Model):
+    topic = models.CharField(
+        max_length=32,
+        verbose_name="Тема",
+        help_text="Вид измененного объекта: recipe, ingredient, user и т.п.",
+    )
+    key = models.CharField(
+        max_length=64,
+        verbose_name="Ключ",
+        help_text="Идентификатор измененного объекта",
+    )
+    created = models.DateTimeField(
+        auto_now_add=True, db_index=True, verbose_name="Дата изменения"
+    )
+
+    class Meta:
+        verbose_name = "Событие изменения"
+        verbose_name_plural = "События изменений"
+        ordering = ["id"]
+
+    def __str__(self):
+        return f"#{self.pk} {self.topic}:{self.key}"
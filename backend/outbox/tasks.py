@@ -0,0 +1,9 @@
+from django.conf import settings
+
+from jobs.queue import periodic
+from .events import prune
+
+
+@periodic("outbox.prune", settings.OUTBOX_PRUNE_INTERVAL)
+def prune_events():
+    prune()
@@ -1,3 +1,99 @@
 from django.contrib import admin
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 
-# Register your models here.
+from api.admin import LargeTableAdmin
+from .models import (
+    Favorite,
+    Recipe,
+    RecipeIngredient,
+    RecipePopularity,
+    ShoppingCart,
+)
+from .snapshots import refresh_snapshots
+
+
+class RecipeIngredientInline(admin.TabularInline):
+    model = RecipeIngredient
+    fields = ("ingredient", "amount")
+    autocomplete_fields = ("ingredient",)
+    extra = 0
+    min_num = 1
+
+
+@admin.register(Recipe)
+class RecipeAdmin(LargeTableAdmin):
+    list_display = (
+        "id",
+        "name",
+        "author",
+        "cooking_time",
+        "pub_date",
+        "favorites",
+    )
+    list_select_related = ("author",)
+    autocomplete_fields = ("author",)
+    search_fields = ("^name",)
+    readonly_fields = ("favorites",)
+    inlines = (RecipeIngredientInline,)
+
+    def get_queryset(self, request):
+        # Коррелированный подзапрос считается только для строк страницы,
+        # а не группировкой по всей таблице избранного.
+        favorites = (
+            Favorite.objects.filter(recipe=OuterRef("pk"))
+            .order_by()
+            .values("recipe")
+            .annotate(count=Count("id"))
+            .values("count")
+        )
+        return (
+            super()
+            .get_queryset(request)
+            .annotate(
+                favorites_count=Coalesce(
+                    Subquery(favorites, output_field=IntegerField()), 0
+                )
+            )
+        )
+
+    @admin.display(description="В избранном")
+    def favorites(self, obj):
+        return obj.favorites_count
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        refresh_snapshots([form.instance.pk])
+
+
+@admin.register(RecipeIngredient)
+class RecipeIngredientAdmin(LargeTableAdmin):
+    list_display = ("id", "recipe", "ingredient", "amount", "canonical_amount")
+    list_select_related = ("recipe", "ingredient")
+    autocomplete_fields = ("recipe", "ingredient")
+    # Считаются в RecipeIngredient.save().
+    readonly_fields = ("canonical_amount", "canonical_unit")
+
+
+class UserRecipeAdmin(LargeTableAdmin):
+    list_display = ("id", "user", "recipe", "created")
+    list_select_related = ("user", "recipe")
+    autocomplete_fields = ("user", "recipe")
+    search_fields = ("^user__username",)
+
+
+@admin.register(Favorite)
+class FavoriteAdmin(UserRecipeAdmin):
+    pass
+
+
+@admin.register(ShoppingCart)
+class ShoppingCartAdmin(UserRecipeAdmin):
+    pass
+
+
+@admin.register(RecipePopularity)
+class RecipePopularityAdmin(LargeTableAdmin):
+    list_display = ("rank", "recipe", "score", "computed_at")
+    list_select_related = ("recipe",)
+    readonly_fields = ("recipe", "score", "rank", "computed_at")
@@ -0,0 +1,249 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import prefetch_related_objects
+
+from api import metrics
+from users.models import Follow
+from users.serializers import absolute_media_url
+from .models import Favorite, Recipe, ShoppingCart
+from .snapshots import expand
+
+# Поколение сбрасывает сразу все фрагменты (например, при переименовании
+# ингредиента), не перечисляя ключи затронутых рецептов.
+GENERATION_KEY = "recipe-fragment-generation"
+
+
+def _generation():
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        generation = 1
+        cache.add(GENERATION_KEY, generation, timeout=None)
+    return generation
+
+
+def _key(recipe_id, generation):
+    return f"recipe-fragment:{generation}:{recipe_id}"
+
+
+# Поля ответа в порядке RecipeSerializer.Meta.fields.
+RECIPE_FIELDS = (
+    "id",
+    "author",
+    "ingredients",
+    "is_favorited",
+    "is_in_shopping_cart",
+    "name",
+    "image",
+    "text",
+    "cooking_time",
+)
+# Без этих полей фрагмент неполон и в кеш не кладется.
+JOINED_FIELDS = {"author", "ingredients"}
+
+
+def _has_snapshot(recipe):
+    return (
+        settings.RECIPE_INGREDIENT_SNAPSHOTS
+        and recipe.ingredients_snapshot is not None
+    )
+
+
+def _prefetch_ingredients(recipes):
+    """Состав через JOIN загружается только для рецептов без снимка."""
+    prefetch_related_objects(
+        [recipe for recipe in recipes if not _has_snapshot(recipe)],
+        "recipe_ingredients__ingredient",
+    )
+    return recipes
+
+
+def _build(recipe, fields=None):
+    """Часть представления рецепта, одинаковая для всех пользователей."""
+    fragment = {"id": recipe.id}
+    if fields is None or "author" in fields:
+        author = recipe.author
+        fragment["author"] = {
+            "id": author.id,
+            "email": author.email,
+            "username": author.username,
+            "first_name": author.first_name,
+            "last_name": author.last_name,
+            "avatar": author.avatar.url if author.avatar else None,
+        }
+    if (fields is None or "ingredients" in fields) and _has_snapshot(recipe):
+        fragment["ingredients"] = expand(recipe.ingredients_snapshot)
+    elif fields is None or "ingredients" in fields:
+        fragment["ingredients"] = [
+            {
+                "id": item.ingredient.id,
+                "name": item.ingredient.name,
+                "measurement_unit": item.ingredient.measurement_unit,
+                "amount": item.amount,
+            }
+            for item in recipe.recipe_ingredients.all()
+        ]
+    if fields is None or "image" in fields:
+        fragment["image"] = recipe.image.url if recipe.image else None
+    for name in ("name", "text", "cooking_time"):
+        if fields is None or name in fields:
+            fragment[name] = getattr(recipe, name)
+    return fragment
+
+
+def _build_partial(recipe_ids, fields):
+    """Фрагменты только с нужными полями: без лишних JOIN и prefetch."""
+    queryset = Recipe.objects.filter(id__in=recipe_ids).order_by()
+    columns = {"name", "image", "text", "cooking_time"} & fields
+    if "author" in fields:
+        queryset = queryset.select_related("author")
+        columns.add("author")
+    recipes = list(queryset.only("id", "ingredients_snapshot", *columns))
+    if "ingredients" in fields:
+        _prefetch_ingredients(recipes)
+    return {recipe.id: _build(recipe, fields) for recipe in recipes}
+
+
+def get_fragments(recipe_ids, fields=None):
+    """Возвращает {id: фрагмент}; недостающие собирает одним запросом.
+
+    Ингредиенты берутся из снимка в Recipe; для рецептов без снимка
+    добавляются два запроса на состав.
+
+    Если fields не содержит автора или ингредиентов, недостающие фрагменты
+    собираются без них и не кешируются.
+    """
+    generation = _generation()
+    keys = {_key(recipe_id, generation): recipe_id for recipe_id in recipe_ids}
+    fragments = {
+        keys[key]: value for key, value in cache.get_many(keys).items()
+    }
+    missing = [
+        recipe_id for recipe_id in recipe_ids if recipe_id not in fragments
+    ]
+    metrics.inc(
+        "foodgram_cache_requests_total",
+        len(fragments),
+        cache="recipe_fragment",
+        result="hit",
+    )
+    metrics.inc(
+        "foodgram_cache_requests_total",
+        len(missing),
+        cache="recipe_fragment",
+        result="miss",
+    )
+    if missing and fields is not None and not JOINED_FIELDS <= fields:
+        fragments.update(_build_partial(missing, fields))
+    elif missing:
+        recipes = _prefetch_ingredients(
+            Recipe.objects.filter(id__in=missing)
+            .order_by()
+            .select_related("author")
+        )
+        built = {recipe.id: _build(recipe) for recipe in recipes}
+        cache.set_many(
+            {
+                _key(recipe_id, generation): value
+                for recipe_id, value in built.items()
+            },
+            timeout=settings.RECIPE_FRAGMENT_TIMEOUT,
+        )
+        fragments.update(built)
+    return fragments
+
+
+def _user_recipe_ids(model, user, recipe_ids):
+    return set(
+        model.objects.filter(user=user, recipe_id__in=recipe_ids).values_list(
+            "recipe_id", flat=True
+        )
+    )
+
+
+def render_recipes(recipe_ids, request, fields=None):
+    """Собирает представления рецептов в порядке recipe_ids.
+
+    Флаги пользователя добавляются поверх общих фрагментов тремя запросами
+    на страницу; запросы для полей, не вошедших в fields, пропускаются.
+    Рецепты, которых нет в базе, пропускаются.
+    """
+    return render_fragments(
+        get_fragments(recipe_ids, fields), recipe_ids, request, fields
+    )
+
+
+def render_fragments(fragments, recipe_ids, request, fields=None):
+    """То же, что render_recipes, для фрагментов из get_fragments."""
+    names = [
+        name for name in RECIPE_FIELDS if fields is None or name in fields
+    ]
+    user = request.user
+    favorited = in_cart = subscribed = frozenset()
+    if user.is_authenticated and fragments:
+        ids = list(fragments)
+        if "is_favorited" in names:
+            favorited = _user_recipe_ids(Favorite, user, ids)
+        if "is_in_shopping_cart" in names:
+            in_cart = _user_recipe_ids(ShoppingCart, user, ids)
+        if "author" in names:
+            subscribed = set(
+                Follow.objects.filter(
+                    user=user,
+                    following_id__in={
+                        fragment["author"]["id"]
+                        for fragment in fragments.values()
+                    },
+                ).values_list("following_id", flat=True)
+            )
+    context = {"request": request}
+    results = []
+    for recipe_id in recipe_ids:
+        fragment = fragments.get(recipe_id)
+        if fragment is None:
+            continue
+        data = {}
+        for name in names:
+            if name == "author":
+                author = fragment["author"]
+                avatar = author["avatar"]
+                data[name] = {
+                    "id": author["id"],
+                    "email": author["email"],
+                    "username": author["username"],
+                    "first_name": author["first_name"],
+                    "last_name": author["last_name"],
+                    "is_subscribed": author["id"] in subscribed,
+                    "avatar": (
+                        absolute_media_url(context, avatar)
+                        if avatar and user.is_authenticated
+                        else None
+                    ),
+                }
+            elif name == "is_favorited":
+                data[name] = recipe_id in favorited
+            elif name == "is_in_shopping_cart":
+                data[name] = recipe_id in in_cart
+            elif name == "image":
+                data[name] = (
+                    absolute_media_url(context, fragment["image"])
+                    if fragment["image"]
+                    else None
+                )
+            else:
+                data[name] = fragment[name]
+        results.append(data)
+    return results
+
+
+def invalidate_recipes(recipe_ids):
+    generation = _generation()
+    cache.delete_many(
+        [_key(recipe_id, generation) for recipe_id in recipe_ids]
+    )
+
+
+def invalidate_all():
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.set(GENERATION_KEY, _generation() + 1, timeout=None)
@@ -0,0 +1,199 @@
+import fcntl
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+import numpy as np
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Как часто процесс проверяет, не опубликована ли новая версия индекса.
+RELOAD_CHECK_INTERVAL = 5
+
+_loaded = {}
+_lock = threading.Lock()
+_held = threading.local()
+
+
+def _index_root(name):
+    return os.path.join(settings.RECIPE_INDEX_DIR, name)
+
+
+def _version_time(entry):
+    """Время публикации из имени каталога версии или None."""
+    stamp = entry.split("-", 1)[0]
+    return int(stamp) if stamp.isdigit() else None
+
+
+@contextmanager
+def index_lock(name):
+    """Блокировка записи индекса между процессами и потоками.
+
+    Чтение текущей версии, изменение и публикация должны выполняться под
+    одной блокировкой, иначе параллельные обновления теряются. Повторный
+    вход в том же потоке не блокирует.
+    """
+    held = getattr(_held, "names", None)
+    if held is None:
+        held = _held.names = set()
+    if name in held:
+        yield
+        return
+    root = _index_root(name)
+    os.makedirs(root, exist_ok=True)
+    with open(os.path.join(root, ".lock"), "a") as file:
+        fcntl.flock(file, fcntl.LOCK_EX)
+        held.add(name)
+        try:
+            yield
+        finally:
+            held.discard(name)
+            fcntl.flock(file, fcntl.LOCK_UN)
+
+
+def save_arrays(name, arrays):
+    """Атомарно публикует новую версию набора массивов индекса."""
+    with index_lock(name):
+        root = _index_root(name)
+        previous = _read_version(name)
+        version = f"{time.time_ns()}-{uuid.uuid4().hex[:8]}"
+        path = os.path.join(root, version)
+        os.makedirs(path)
+        for key, array in arrays.items():
+            np.save(
+                os.path.join(path, f"{key}.npy"), np.ascontiguousarray(array)
+            )
+        pointer = os.path.join(root, f"CURRENT.{version}")
+        with open(pointer, "w") as file:
+            file.write(version)
+        os.replace(pointer, os.path.join(root, "CURRENT"))
+        # Замененная версия остается для читателей, которые только что
+        # прочитали CURRENT; удаляются лишь более старые. Уже открытые
+        # воркерами memmap-файлы доступны и после удаления.
+        if previous is not None:
+            _prune(root, _version_time(previous))
+
+
+def _prune(root, before):
+    for entry in os.listdir(root):
+        if entry.startswith("CURRENT."):
+            # Указатель, оставшийся от прерванной публикации.
+            os.remove(os.path.join(root, entry))
+            continue
+        published = _version_time(entry)
+        if published is not None and published < before:
+            shutil.rmtree(os.path.join(root, entry), ignore_errors=True)
+
+
+def _read_version(name):
+    try:
+        with open(os.path.join(_index_root(name), "CURRENT")) as file:
+            return file.read().strip()
+    except FileNotFoundError:
+        return None
+
+
+def _open_arrays(path):
+    return {
+        entry[:-4]: np.load(os.path.join(path, entry), mmap_mode="r")
+        for entry in os.listdir(path)
+        if entry.endswith(".npy")
+    }
+
+
+def _open_segments(path, arrays, segments):
+    """Дописываемые сегменты версии; неполная последняя запись не видна."""
+    opened = {}
+    for segment, dtype in segments.items():
+        dtype = np.dtype(dtype(arrays))
+        file = os.path.join(path, f"{segment}.seg")
+        try:
+            count = os.path.getsize(file) // dtype.itemsize
+        except FileNotFoundError:
+            count = 0
+        opened[segment] = (
+            np.memmap(file, dtype=dtype, mode="r", shape=(count,))
+            if count
+            else np.empty(0, dtype=dtype)
+        )
+    return opened
+
+
+def load_arrays(name, segments=None):
+    """Возвращает словарь memmap-массивов текущей версии или None.
+
+    segments: {имя: функция(массивы) -> dtype} для сегментов, дописанных
+    через append_segment; они перечитываются вместе с проверкой версии.
+    """
+    now = time.monotonic()
+    cached = _loaded.get(name)
+    if cached and now - cached["checked"] < RELOAD_CHECK_INTERVAL:
+        return cached["arrays"]
+    with _lock:
+        version = _read_version(name)
+        if cached and cached["version"] == version:
+            base = cached["base"]
+        elif version is None:
+            base = None
+        else:
+            try:
+                base = _open_arrays(os.path.join(_index_root(name), version))
+            except FileNotFoundError:
+                logger.warning(
+                    "Версия %s индекса %s не найдена", version, name
+                )
+                return cached["arrays"] if cached else None
+        arrays = base
+        if base is not None and segments:
+            path = os.path.join(_index_root(name), version)
+            arrays = {**base, **_open_segments(path, base, segments)}
+        _loaded[name] = {
+            "version": version,
+            "base": base,
+            "arrays": arrays,
+            "checked": now,
+        }
+        return arrays
+
+
+def current_arrays(name):
+    """Текущая версия без кеша процесса, для записи под index_lock.
+
+    None, если индекс не построен или CURRENT указывает на удаленный
+    каталог: тогда индекс нужно перестроить целиком.
+    """
+    version = _read_version(name)
+    if version is None:
+        return None
+    try:
+        return _open_arrays(os.path.join(_index_root(name), version))
+    except FileNotFoundError:
+        logger.warning("Версия %s индекса %s не найдена", version, name)
+        return None
+
+
+def load_segment(name, segment, dtype):
+    """Сегмент текущей версии без кеша процесса, для записи под index_lock."""
+    version = _read_version(name)
+    path = os.path.join(_index_root(name), version)
+    return _open_segments(path, None, {segment: lambda arrays: dtype})[segment]
+
+
+def latest_records(records):
+    """Последняя запись сегмента для каждого id."""
+    if not len(records):
+        return records
+    _, last = np.unique(records["id"][::-1], return_index=True)
+    return records[len(records) - 1 - last]
+
+
+def append_segment(name, segment, records):
+    """Дописывает записи к сегменту текущей версии; вызывать под index_lock."""
+    path = os.path.join(_index_root(name), _read_version(name))
+    with open(os.path.join(path, f"{segment}.seg"), "ab") as file:
+        file.write(records.tobytes())
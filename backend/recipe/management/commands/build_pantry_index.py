@@ -0,0 +1,18 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from recipe.pantry import build_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the ingredient bitset index used by /api/recipes/pantry/"
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        count = build_index()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Indexed {count} recipes in {time.monotonic() - started:.2f}s"
+            )
+        )
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from recipe.similarity import build_index, update_index
+
+
+class Command(BaseCommand):
+    help = (
+        "Build the MinHash/LSH index used by /api/recipes/{id}/similar/. "
+        "Pass --recipes to recompute only the given recipes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--recipes",
+            nargs="+",
+            type=int,
+            help="Recipe ids to add, refresh or drop from the existing index",
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        if options["recipes"]:
+            count = update_index(options["recipes"])
+        else:
+            count = build_index()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Indexed {count} recipes in {time.monotonic() - started:.2f}s"
+            )
+        )
@@ -0,0 +1,65 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from recipe.models import Recipe
+from recipe.snapshots import build_snapshots, save_snapshots
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare Recipe.ingredients_snapshot with the recipe ingredients and "
+        "report recipes whose snapshot is missing or out of date."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--repair",
+            action="store_true",
+            help="Rebuild missing and stale snapshots",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        checked = missing = stale = 0
+        last_id = 0
+        batch_size = options["batch_size"]
+        while True:
+            stored = dict(
+                Recipe.objects.filter(id__gt=last_id)
+                .order_by("id")
+                .values_list("id", "ingredients_snapshot")[:batch_size]
+            )
+            if not stored:
+                break
+            last_id = max(stored)
+            expected = build_snapshots(list(stored))
+            broken = {}
+            for recipe_id, snapshot in expected.items():
+                if stored[recipe_id] is None:
+                    missing += 1
+                elif stored[recipe_id] != snapshot:
+                    stale += 1
+                    self.stdout.write(
+                        f"Recipe {recipe_id}: snapshot is out of date"
+                    )
+                else:
+                    continue
+                broken[recipe_id] = snapshot
+            if options["repair"] and broken:
+                with transaction.atomic():
+                    # Состав мог измениться после чтения: пересобираем под
+                    # блокировкой.
+                    locked = Recipe.objects.select_for_update()
+                    list(locked.filter(id__in=broken))
+                    save_snapshots(build_snapshots(list(broken)))
+            checked += len(stored)
+        message = (
+            f"{checked} recipes checked, {missing} without snapshot, "
+            f"{stale} stale"
+        )
+        if options["repair"]:
+            self.stdout.write(self.style.SUCCESS(f"{message}; repaired"))
+        elif stale:
+            raise CommandError(message)
+        else:
+            self.stdout.write(message)
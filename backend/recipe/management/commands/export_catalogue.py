@@ -0,0 +1,128 @@
+import json
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Exists, OuterRef, Prefetch
+
+from ingredient.models import Ingredient
+from recipe.models import Recipe, RecipeIngredient
+from users.models import User
+
+FORMAT_VERSION = 1
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream ingredients, recipe authors and recipes with their "
+        "ingredients as NDJSON. Images are exported as storage paths."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("output", help="Output file, or - for stdout")
+        parser.add_argument("--chunk-size", type=int, default=2000)
+        parser.add_argument(
+            "--include-passwords",
+            action="store_true",
+            help="Export password hashes so authors can log in after import",
+        )
+
+    def handle(self, *args, **options):
+        self.chunk_size = options["chunk_size"]
+        self.started = time.monotonic()
+        self.lines = 0
+        if options["output"] == "-":
+            self._export(sys.stdout, options)
+        else:
+            with open(options["output"], "w", encoding="utf-8") as output:
+                self._export(output, options)
+        self._report(final=True)
+
+    def _write(self, output, record):
+        output.write(json.dumps(record, ensure_ascii=False))
+        output.write("\n")
+        self.lines += 1
+        if self.lines % 50_000 == 0:
+            self._report()
+
+    def _report(self, final=False):
+        elapsed = max(time.monotonic() - self.started, 1e-6)
+        message = (
+            f"{self.lines} lines in {elapsed:.1f}s "
+            f"({self.lines / elapsed:.0f} lines/s)"
+        )
+        # stdout может быть занят самим экспортом.
+        self.stderr.write(self.style.SUCCESS(message) if final else message)
+
+    def _export(self, output, options):
+        self._write(output, {"type": "header", "version": FORMAT_VERSION})
+        for name, unit in (
+            Ingredient.objects.order_by("id")
+            .values_list("name", "measurement_unit")
+            .iterator(chunk_size=self.chunk_size)
+        ):
+            self._write(
+                output,
+                {"type": "ingredient", "name": name, "measurement_unit": unit},
+            )
+        authors = User.objects.filter(
+            Exists(Recipe.objects.filter(author=OuterRef("pk")))
+        ).order_by("id")
+        for author in authors.iterator(chunk_size=self.chunk_size):
+            record = {
+                "type": "user",
+                "email": author.email,
+                "username": author.username,
+                "first_name": author.first_name,
+                "last_name": author.last_name,
+                "avatar": author.avatar.name or None,
+            }
+            if options["include_passwords"]:
+                record["password"] = author.password
+            self._write(output, record)
+        recipes = (
+            Recipe.objects.select_related("author")
+            .only(
+                "name",
+                "text",
+                "cooking_time",
+                "image",
+                "pub_date",
+                "author__email",
+            )
+            .prefetch_related(
+                Prefetch(
+                    "recipe_ingredients",
+                    queryset=RecipeIngredient.objects.select_related(
+                        "ingredient"
+                    ).only(
+                        "recipe_id",
+                        "amount",
+                        "ingredient__name",
+                        "ingredient__measurement_unit",
+                    ),
+                )
+            )
+            .order_by("id")
+        )
+        for recipe in recipes.iterator(chunk_size=self.chunk_size):
+            self._write(
+                output,
+                {
+                    "type": "recipe",
+                    "author": recipe.author.email,
+                    "name": recipe.name,
+                    "text": recipe.text,
+                    "cooking_time": recipe.cooking_time,
+                    "image": recipe.image.name,
+                    "pub_date": recipe.pub_date.isoformat(),
+                    "ingredients": [
+                        [
+                            item.ingredient.name,
+                            item.ingredient.measurement_unit,
+                            item.amount,
+                        ]
+                        for item in recipe.recipe_ingredients.all()
+                    ],
+                },
+            )
@@ -0,0 +1,222 @@
+import json
+import os
+import time
+from datetime import datetime
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from ingredient.models import Ingredient
+from ingredient.units import conversions
+from recipe.models import Recipe, RecipeIngredient
+from users.models import User
+
+from .export_catalogue import FORMAT_VERSION
+
+REPORT_INTERVAL = 5
+
+
+class Command(BaseCommand):
+    help = (
+        "Import an NDJSON catalogue written by export_catalogue. Rows are "
+        "matched by natural keys, so an interrupted import can be resumed "
+        "from its checkpoint or safely run again."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("input")
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--checkpoint",
+            help="Checkpoint file (default: <input>.checkpoint)",
+        )
+        parser.add_argument(
+            "--restart",
+            action="store_true",
+            help="Ignore an existing checkpoint and start from the beginning",
+        )
+
+    def handle(self, *args, **options):
+        checkpoint = options["checkpoint"] or f"{options['input']}.checkpoint"
+        state = {"offset": 0, "lines": 0}
+        if not options["restart"] and os.path.exists(checkpoint):
+            with open(checkpoint) as file:
+                state = json.load(file)
+            self.stderr.write(f"Resuming after line {state['lines']}")
+        self.ingredients = {}
+        self.started = self.reported = time.monotonic()
+        self.imported = 0
+        self.skipped = 0
+        with open(options["input"], "rb") as file:
+            file.seek(state["offset"])
+            batch_type, batch = None, []
+            while True:
+                line = file.readline()
+                record = json.loads(line) if line.strip() else None
+                if batch and (
+                    record is None
+                    or record["type"] != batch_type
+                    or len(batch) >= options["batch_size"]
+                ):
+                    with transaction.atomic():
+                        self._import(batch_type, batch)
+                    state["lines"] += len(batch)
+                    # Смещение начала текущей строки: она еще не импортирована.
+                    state["offset"] = file.tell() - len(line)
+                    self._save_checkpoint(checkpoint, state)
+                    if time.monotonic() - self.reported >= REPORT_INTERVAL:
+                        self._report(state["lines"])
+                    batch = []
+                if not line:
+                    break
+                if record is None:
+                    continue
+                if record["type"] == "header":
+                    if record["version"] != FORMAT_VERSION:
+                        raise CommandError(
+                            "Unsupported catalogue version "
+                            f"{record['version']}"
+                        )
+                    state["lines"] += 1
+                    continue
+                batch_type = record["type"]
+                batch.append(record)
+        if os.path.exists(checkpoint):
+            os.remove(checkpoint)
+        self._report(state["lines"], final=True)
+        self.stdout.write(
+            "Rebuild derived data with recompute_popularity --full, "
+            "build_similarity_index and build_pantry_index"
+        )
+
+    def _save_checkpoint(self, path, state):
+        with open(f"{path}.tmp", "w") as file:
+            json.dump(state, file)
+        os.replace(f"{path}.tmp", path)
+
+    def _report(self, lines, final=False):
+        self.reported = time.monotonic()
+        elapsed = max(time.monotonic() - self.started, 1e-6)
+        message = (
+            f"{lines} lines read, {self.imported} rows imported, "
+            f"{self.skipped} skipped in {elapsed:.1f}s "
+            f"({self.imported / elapsed:.0f} rows/s)"
+        )
+        self.stderr.write(self.style.SUCCESS(message) if final else message)
+
+    def _import(self, batch_type, batch):
+        handler = getattr(self, f"_import_{batch_type}", None)
+        if handler is None:
+            raise CommandError(f"Unknown record type: {batch_type}")
+        handler(batch)
+
+    def _import_ingredient(self, batch):
+        Ingredient.objects.bulk_create(
+            [
+                Ingredient(
+                    name=item["name"],
+                    measurement_unit=item["measurement_unit"],
+                )
+                for item in batch
+            ],
+            ignore_conflicts=True,
+        )
+        self.imported += len(batch)
+
+    def _import_user(self, batch):
+        unusable = make_password(None)
+        User.objects.bulk_create(
+            [
+                User(
+                    email=item["email"],
+                    username=item["username"],
+                    first_name=item["first_name"],
+                    last_name=item["last_name"],
+                    avatar=item["avatar"],
+                    password=item.get("password") or unusable,
+                )
+                for item in batch
+            ],
+            ignore_conflicts=True,
+        )
+        self.imported += len(batch)
+
+    def _ingredient_ids(self, keys):
+        missing = {key for key in keys if key not in self.ingredients}
+        if missing:
+            for pk, name, unit in Ingredient.objects.filter(
+                name__in={name for name, _ in missing}
+            ).values_list("id", "name", "measurement_unit"):
+                self.ingredients[name, unit] = pk
+        return self.ingredients
+
+    def _import_recipe(self, batch):
+        authors = dict(
+            User.objects.filter(
+                email__in={item["author"] for item in batch}
+            ).values_list("email", "id")
+        )
+        # Уже импортированные рецепты не трогаем: повторный запуск не должен
+        # менять их дату и состав в обход событий outbox.
+        existing = set(
+            Recipe.objects.filter(
+                author_id__in=set(authors.values()),
+                name__in={item["name"] for item in batch},
+            ).values_list("author_id", "name")
+        )
+        pairs = []
+        for item in batch:
+            author_id = authors.get(item["author"])
+            if author_id is None or (author_id, item["name"]) in existing:
+                self.skipped += 1
+                continue
+            existing.add((author_id, item["name"]))
+            recipe = Recipe(
+                author_id=author_id,
+                name=item["name"],
+                text=item["text"],
+                cooking_time=item["cooking_time"],
+                image=item["image"],
+            )
+            pairs.append((recipe, item))
+        recipes = [recipe for recipe, _ in pairs]
+        Recipe.objects.bulk_create(recipes)
+        keys = {
+            (name, unit)
+            for _, item in pairs
+            for name, unit, _ in item["ingredients"]
+        }
+        ingredient_ids = self._ingredient_ids(keys)
+        units = conversions({unit for _, unit in keys})
+        rows = []
+        for recipe, item in pairs:
+            # auto_now_add перезаписывает дату при вставке, возвращаем
+            # исходную.
+            recipe.pub_date = datetime.fromisoformat(item["pub_date"])
+            # Снимок состава строится из тех же данных, что и строки.
+            recipe.ingredients_snapshot = []
+            seen = set()
+            for name, unit, amount in item["ingredients"]:
+                ingredient_id = ingredient_ids.get((name, unit))
+                if ingredient_id is None or ingredient_id in seen:
+                    continue
+                seen.add(ingredient_id)
+                recipe.ingredients_snapshot.append(
+                    [ingredient_id, name, unit, amount]
+                )
+                canonical_unit, factor = units[unit]
+                rows.append(
+                    RecipeIngredient(
+                        recipe_id=recipe.pk,
+                        ingredient_id=ingredient_id,
+                        amount=amount,
+                        canonical_amount=amount * factor,
+                        canonical_unit=canonical_unit,
+                    )
+                )
+        Recipe.objects.bulk_update(
+            recipes, ["pub_date", "ingredients_snapshot"]
+        )
+        RecipeIngredient.objects.bulk_create(rows, ignore_conflicts=True)
+        self.imported += len(recipes) + len(rows)
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from recipe.popularity import recompute_popularity
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the time-decayed popular recipes ranking. By default only "
+        "favorites and shopping cart adds since the previous run are scanned; "
+        "use --full to rebuild from scratch and drop removed events."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Rebuild the ranking from all events",
+        )
+
+    def handle(self, *args, **options):
+        count = recompute_popularity(full=options["full"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Updated scores of {count} recipes")
+        )
@@ -0,0 +1,89 @@
+# Generated by Django 4.2.21 on 2026-10-19 09:36
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipe", "0002_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="favorite",
+            name="created",
+            field=models.DateTimeField(
+                auto_now_add=True,
+                default=django.utils.timezone.now,
+                help_text="Дата добавления в избранное",
+                verbose_name="Дата добавления",
+            ),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name="shoppingcart",
+            name="created",
+            field=models.DateTimeField(
+                auto_now_add=True,
+                default=django.utils.timezone.now,
+                help_text="Дата добавления в список покупок",
+                verbose_name="Дата добавления",
+            ),
+            preserve_default=False,
+        ),
+        migrations.CreateModel(
+            name="RecipePopularity",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "score",
+                    models.FloatField(
+                        default=0,
+                        help_text="Популярность с учетом затухания по времени",
+                        verbose_name="Очки",
+                    ),
+                ),
+                (
+                    "rank",
+                    models.PositiveIntegerField(
+                        db_index=True,
+                        help_text="Место рецепта в рейтинге",
+                        verbose_name="Место",
+                    ),
+                ),
+                (
+                    "computed_at",
+                    models.DateTimeField(
+                        help_text="Момент, на который рассчитаны очки",
+                        verbose_name="Дата расчета",
+                    ),
+                ),
+                (
+                    "recipe",
+                    models.OneToOneField(
+                        help_text="Рецепт в рейтинге популярности",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="popularity",
+                        to="recipe.recipe",
+                        verbose_name="Рецепт",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Популярность рецепта",
+                "verbose_name_plural": "Популярность рецептов",
+                "ordering": ["rank"],
+            },
+        ),
+    ]
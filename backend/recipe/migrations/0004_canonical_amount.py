@@ -0,0 +1,59 @@
+# Generated by Django 4.2.21 on 2026-10-19 09:40
+
+from django.db import migrations, models
+
+
+def fill_canonical_amounts(apps, schema_editor):
+    RecipeIngredient = apps.get_model("recipe", "RecipeIngredient")
+    UnitConversion = apps.get_model("ingredient", "UnitConversion")
+    conversions = {
+        unit: (canonical_unit, factor)
+        for unit, canonical_unit, factor in UnitConversion.objects.values_list(
+            "unit", "canonical_unit", "factor"
+        )
+    }
+    batch = []
+    for item in RecipeIngredient.objects.select_related("ingredient").iterator(
+        chunk_size=2000
+    ):
+        unit = item.ingredient.measurement_unit
+        item.canonical_unit, factor = conversions.get(unit, (unit, 1))
+        item.canonical_amount = item.amount * factor
+        batch.append(item)
+        if len(batch) >= 2000:
+            RecipeIngredient.objects.bulk_update(
+                batch, ["canonical_unit", "canonical_amount"]
+            )
+            batch = []
+    RecipeIngredient.objects.bulk_update(batch, ["canonical_unit", "canonical_amount"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ingredient", "0002_unit_conversion"),
+        ("recipe", "0003_popularity"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recipeingredient",
+            name="canonical_amount",
+            field=models.FloatField(
+                default=0,
+                help_text="Количество, приведенное к базовой единице измерения",
+                verbose_name="Количество в базовых единицах",
+            ),
+        ),
+        migrations.AddField(
+            model_name="recipeingredient",
+            name="canonical_unit",
+            field=models.CharField(
+                blank=True,
+                help_text="Базовая единица измерения для суммирования",
+                max_length=20,
+                verbose_name="Базовая единица",
+            ),
+        ),
+        migrations.RunPython(fill_canonical_amounts, migrations.RunPython.noop),
+    ]
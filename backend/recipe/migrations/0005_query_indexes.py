@@ -0,0 +1,37 @@
+# Generated by Django 4.2.21 on 2026-10-19 09:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipe", "0004_canonical_amount"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="favorite",
+            index=models.Index(fields=["created"], name="favorite_created_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="recipe",
+            index=models.Index(fields=["-pub_date"], name="recipe_pub_date_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="recipe",
+            index=models.Index(
+                fields=["author", "-pub_date"], name="recipe_author_pub_date_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="recipeingredient",
+            index=models.Index(
+                fields=["ingredient", "recipe"], name="recipe_ingredient_recipe_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="shoppingcart",
+            index=models.Index(fields=["created"], name="shopping_cart_created_idx"),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.21 on 2026-10-19 10:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipe", "0005_query_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recipe",
+            name="ingredients_snapshot",
+            field=models.JSONField(
+                blank=True,
+                editable=False,
+                help_text="[[id, название, единица, количество], ...] для чтения без JOIN",
+                null=True,
+                verbose_name="Снимок ингредиентов",
+            ),
+        ),
+    ]
@@ -2,6 +2,7 @@ from django.core.validators import MinValueValidator
 from django.db import models
 
 from ingredient.models import Ingredient
+from ingredient.units import conversions
 from users.models import User
 
 
@@ -39,6 +40,15 @@ class Recipe(models.Model):
         verbose_name="Дата публикации",
         help_text="Дата публикации рецепта",
     )
+    ingredients_snapshot = models.JSONField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name="Снимок ингредиентов",
+        help_text=(
+            "[[id, название, единица, количество], ...] для чтения без JOIN"
+        ),
+    )
 
     class Meta:
         verbose_name = "Рецепт"
@@ -47,6 +57,13 @@ class Recipe(models.Model):
         constraints = [
             models.UniqueConstraint(fields=["author", "name"], name="unique_recipe")
         ]
+        indexes = [
+            models.Index(fields=["-pub_date"], name="recipe_pub_date_idx"),
+            models.Index(
+                fields=["author", "-pub_date"],
+                name="recipe_author_pub_date_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -71,6 +88,17 @@ class RecipeIngredient(models.Model):
         verbose_name="Количество",
         help_text="Количество ингредиента",
     )
+    canonical_amount = models.FloatField(
+        default=0,
+        verbose_name="Количество в базовых единицах",
+        help_text="Количество, приведенное к базовой единице измерения",
+    )
+    canonical_unit = models.CharField(
+        max_length=20,
+        blank=True,
+        verbose_name="Базовая единица",
+        help_text="Базовая единица измерения для суммирования",
+    )
 
     class Meta:
         verbose_name = "Ингредиент в рецепте"
@@ -80,6 +108,27 @@ class RecipeIngredient(models.Model):
                 fields=["recipe", "ingredient"], name="unique_recipe_ingredient"
             )
         ]
+        indexes = [
+            models.Index(
+                fields=["ingredient", "recipe"],
+                name="recipe_ingredient_recipe_idx",
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        # Админка и другие пути записи в обход RecipeSerializer: без базовых
+        # единиц строка выпадает из суммирования в списке покупок.
+        unit = self.ingredient.measurement_unit
+        self.canonical_unit, factor = conversions([unit])[unit]
+        self.canonical_amount = self.amount * factor
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            kwargs["update_fields"] = {
+                *update_fields,
+                "canonical_amount",
+                "canonical_unit",
+            }
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return (
@@ -102,6 +151,11 @@ class Favorite(models.Model):
         verbose_name="Рецепт",
         help_text="Рецепт в избранном",
     )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="Дата добавления",
+        help_text="Дата добавления в избранное",
+    )
 
     class Meta:
         verbose_name = "Избранное"
@@ -109,6 +163,9 @@ class Favorite(models.Model):
         constraints = [
             models.UniqueConstraint(fields=["user", "recipe"], name="unique_favorite")
         ]
+        indexes = [
+            models.Index(fields=["created"], name="favorite_created_idx"),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.recipe.name}"
@@ -129,6 +186,11 @@ class ShoppingCart(models.Model):
         verbose_name="Рецепт",
         help_text="Рецепт в списке покупок",
     )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="Дата добавления",
+        help_text="Дата добавления в список покупок",
+    )
 
     class Meta:
         verbose_name = "Список покупок"
@@ -138,6 +200,41 @@ class ShoppingCart(models.Model):
                 fields=["user", "recipe"], name="unique_shopping_cart"
             )
         ]
+        indexes = [
+            models.Index(fields=["created"], name="shopping_cart_created_idx"),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.recipe.name}"
+
+
+class RecipePopularity(models.Model):
+    recipe = models.OneToOneField(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name="popularity",
+        verbose_name="Рецепт",
+        help_text="Рецепт в рейтинге популярности",
+    )
+    score = models.FloatField(
+        default=0,
+        verbose_name="Очки",
+        help_text="Популярность с учетом затухания по времени",
+    )
+    rank = models.PositiveIntegerField(
+        db_index=True,
+        verbose_name="Место",
+        help_text="Место рецепта в рейтинге",
+    )
+    computed_at = models.DateTimeField(
+        verbose_name="Дата расчета",
+        help_text="Момент, на который рассчитаны очки",
+    )
+
+    class Meta:
+        verbose_name = "Популярность рецепта"
+        verbose_name_plural = "Популярность рецептов"
+        ordering = ["rank"]
+
+    def __str__(self):
+        return f"{self.rank}. {self.recipe_id} ({self.score:.2f})"
@@ -0,0 +1,27 @@
+from django.db.models import Max
+from rest_framework.pagination import LimitOffsetPagination
+
+from .models import RecipePopularity
+
+
+class RankPagination(LimitOffsetPagination):
+    """Пагинация по диапазону мест вместо OFFSET: ранги идут подряд с 1."""
+
+    def get_count(self, queryset):
+        return (
+            RecipePopularity.objects.aggregate(Max("rank"))["rank__max"] or 0
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+        self.offset = self.get_offset(request)
+        self.count = self.get_count(queryset)
+        return list(
+            queryset.filter(
+                popularity__rank__gt=self.offset,
+                popularity__rank__lte=self.offset + self.limit,
+            )
+        )
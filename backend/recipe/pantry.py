@@ -0,0 +1,179 @@
+import numpy as np
+from django.db.models import Max
+
+from ingredient.models import Ingredient
+from .indexes import (
+    append_segment,
+    current_arrays,
+    index_lock,
+    latest_records,
+    load_arrays,
+    load_segment,
+    save_arrays,
+)
+from .models import RecipeIngredient
+
+INDEX_NAME = "pantry"
+# Дельта сливается с базой, когда в ней столько строк (или 10% базы).
+DELTA_MIN_ROWS = 1000
+
+_POPCOUNT = np.array(
+    [bin(value).count("1") for value in range(256)], dtype=np.uint8
+)
+
+
+def _width():
+    max_id = Ingredient.objects.aggregate(Max("id"))["id__max"] or 0
+    # Запас, чтобы новые ингредиенты не требовали полной перестройки.
+    return (max_id + 64) // 8 * 8
+
+
+def _encode(recipe_ids, width):
+    """Собирает упакованные битовые строки ингредиентов для рецептов."""
+    rows = RecipeIngredient.objects.order_by("recipe_id")
+    if recipe_ids is not None:
+        rows = rows.filter(recipe_id__in=recipe_ids)
+    pairs = np.fromiter(
+        (
+            value
+            for pair in rows.values_list(
+                "recipe_id", "ingredient_id"
+            ).iterator(chunk_size=10000)
+            for value in pair
+        ),
+        dtype=np.int64,
+    ).reshape(-1, 2)
+    ids, positions = np.unique(pairs[:, 0], return_inverse=True)
+    if len(pairs) and pairs[:, 1].max() >= width:
+        return None
+    # Раскладка битов совпадает с np.packbits: старший бит байта первый.
+    bits = np.zeros((len(ids), width // 8), dtype=np.uint8)
+    np.bitwise_or.at(
+        bits,
+        (positions, pairs[:, 1] // 8),
+        (np.uint8(128) >> (pairs[:, 1] % 8)).astype(np.uint8),
+    )
+    sizes = np.bincount(positions, minlength=len(ids)).astype(np.uint16)
+    return ids, bits, sizes
+
+
+def _delta_dtype(width):
+    return np.dtype(
+        [("id", "<i8"), ("size", "<u2"), ("bits", "u1", (width // 8,))]
+    )
+
+
+def _segments():
+    return {"delta": lambda arrays: _delta_dtype(arrays["bits"].shape[1] * 8)}
+
+
+def _merge(index, delta):
+    """Базовые строки, замененные дельтой; рецепты с size=0 удалены."""
+    keep = ~np.isin(index["ids"], delta["id"])
+    live = delta["size"] > 0
+    ids = np.concatenate([index["ids"][keep], delta["id"][live]])
+    order = np.argsort(ids, kind="stable")
+    return {
+        "ids": ids[order],
+        "bits": np.concatenate([index["bits"][keep], delta["bits"][live]])[
+            order
+        ],
+        "sizes": np.concatenate([index["sizes"][keep], delta["size"][live]])[
+            order
+        ],
+    }
+
+
+def build_index():
+    with index_lock(INDEX_NAME):
+        ids, bits, sizes = _encode(None, _width())
+        save_arrays(INDEX_NAME, {"ids": ids, "bits": bits, "sizes": sizes})
+        return len(ids)
+
+
+def update_index(recipe_ids):
+    """Дописывает строки рецептов после создания, изменения или удаления.
+
+    Базовые массивы версии не меняются: новые строки попадают в сегмент
+    delta, а когда он разрастается, индекс сливается в новую версию.
+    """
+    with index_lock(INDEX_NAME):
+        index = current_arrays(INDEX_NAME)
+        if index is None:
+            return build_index()
+        width = index["bits"].shape[1] * 8
+        recipe_ids = np.unique(np.asarray(list(recipe_ids), dtype=np.int64))
+        encoded = _encode(recipe_ids.tolist(), width)
+        if encoded is None:
+            # Появился ингредиент шире запаса битов.
+            return build_index()
+        new_ids, new_bits, new_sizes = encoded
+        # Рецепты без строк удалены или остались без ингредиентов.
+        records = np.zeros(len(recipe_ids), dtype=_delta_dtype(width))
+        records["id"] = recipe_ids
+        rows = np.searchsorted(recipe_ids, new_ids)
+        records["size"][rows] = new_sizes
+        records["bits"][rows] = new_bits
+        append_segment(INDEX_NAME, "delta", records)
+        delta = load_segment(INDEX_NAME, "delta", _delta_dtype(width))
+        if len(delta) < max(DELTA_MIN_ROWS, len(index["ids"]) // 10):
+            return len(index["ids"])
+        merged = _merge(index, latest_records(delta))
+        save_arrays(INDEX_NAME, merged)
+        return len(merged["ids"])
+
+
+def _match(ids, bits, sizes, pantry, columns, max_missing):
+    sizes = sizes.astype(np.int32)
+    matched = (
+        _POPCOUNT[bits[:, columns] & pantry[columns]].sum(
+            axis=1, dtype=np.int32
+        )
+        if len(columns)
+        else np.zeros(len(sizes), dtype=np.int32)
+    )
+    missing = sizes - matched
+    candidates = np.flatnonzero((sizes > 0) & (missing <= max_missing))
+    return (
+        ids[candidates],
+        matched[candidates] / sizes[candidates],
+        missing[candidates],
+    )
+
+
+def match_pantry(ingredient_ids, max_missing, limit):
+    """Возвращает [(recipe_id, покрытие, не хватает)] по убыванию покрытия."""
+    index = load_arrays(INDEX_NAME, _segments())
+    if index is None:
+        return []
+    width = index["bits"].shape[1] * 8
+    pantry = np.zeros(width, dtype=bool)
+    ingredient_ids = [value for value in ingredient_ids if 0 <= value < width]
+    pantry[ingredient_ids] = True
+    pantry = np.packbits(pantry)
+    # Пересечение имеет смысл считать только по байтам, где есть продукты.
+    columns = np.flatnonzero(pantry)
+    delta = latest_records(index["delta"])
+    # Строки базы, замененные дельтой, не учитываются.
+    sizes = np.where(
+        np.isin(index["ids"], delta["id"]), 0, index["sizes"]
+    ).astype(np.uint16)
+    parts = [
+        _match(
+            index["ids"], index["bits"], sizes, pantry, columns, max_missing
+        ),
+        _match(
+            delta["id"],
+            delta["bits"],
+            delta["size"],
+            pantry,
+            columns,
+            max_missing,
+        ),
+    ]
+    ids, coverage, missing = (
+        np.concatenate([part[i] for part in parts]) for i in range(3)
+    )
+    # Равные по покрытию — по id, как в базовых массивах.
+    order = np.lexsort((ids, missing, -coverage))[:limit]
+    return [(int(ids[i]), float(coverage[i]), int(missing[i])) for i in order]
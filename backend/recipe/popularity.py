@@ -0,0 +1,110 @@
+import math
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import Favorite, RecipePopularity, ShoppingCart
+
+FAVORITE_WEIGHT = 1.0
+SHOPPING_CART_WEIGHT = 0.5
+
+# События с отметкой времени свежее этой задержки могут быть еще не
+# закоммичены, поэтому их учитываем при следующем пересчете.
+SETTLE_DELAY = timedelta(minutes=1)
+
+# Очки хранятся как логарифм суммы весов, приведенных к этой дате. Затухание
+# одинаково умножает очки всех рецептов, поэтому их порядок от времени не
+# зависит: пересчитывать нужно только рецепты с новыми событиями.
+EPOCH = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+
+# Места пересчитываются в базе; записываются только изменившиеся строки.
+RERANK = """
+UPDATE {table} SET rank = ranked.position
+FROM (
+    SELECT id, ROW_NUMBER() OVER (ORDER BY score DESC, recipe_id) AS position
+    FROM {table}
+) AS ranked
+WHERE {table}.id = ranked.id AND {table}.rank <> ranked.position
+"""
+
+
+def decay_rate():
+    return math.log(2) / (settings.POPULARITY_HALF_LIFE_DAYS * 24 * 60 * 60)
+
+
+def _log_add(a, b):
+    if a is None:
+        return b
+    high, low = max(a, b), min(a, b)
+    return high + math.log1p(math.exp(low - high))
+
+
+def _add_events(scores, since, until, rate):
+    for model, weight in (
+        (Favorite, FAVORITE_WEIGHT),
+        (ShoppingCart, SHOPPING_CART_WEIGHT),
+    ):
+        events = model.objects.filter(created__lte=until)
+        if since is not None:
+            events = events.filter(created__gt=since)
+        for recipe_id, created in events.values_list(
+            "recipe_id", "created"
+        ).iterator(chunk_size=10000):
+            age = (created - EPOCH).total_seconds()
+            scores[recipe_id] = _log_add(
+                scores[recipe_id], math.log(weight) + rate * age
+            )
+
+
+def _rerank():
+    table = connection.ops.quote_name(RecipePopularity._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(RERANK.format(table=table))
+
+
+@transaction.atomic
+def recompute_popularity(full=False):
+    """Обновляет рейтинг; возвращает число рецептов с новыми очками.
+
+    По умолчанию читаются только события после прошлого пересчета и
+    меняются строки только затронутых ими рецептов.
+    """
+    until = timezone.now() - SETTLE_DELAY
+    rate = decay_rate()
+    scores = defaultdict(lambda: None)
+    since = None
+    if not full:
+        since = RecipePopularity.objects.aggregate(Max("computed_at"))[
+            "computed_at__max"
+        ]
+    if since is None:
+        RecipePopularity.objects.all().delete()
+    _add_events(scores, since, until, rate)
+    if not scores:
+        return 0
+    existing = RecipePopularity.objects.in_bulk(
+        list(scores), field_name="recipe_id"
+    )
+    created, updated = [], []
+    for recipe_id, score in scores.items():
+        row = existing.get(recipe_id)
+        if row is None:
+            created.append(
+                RecipePopularity(
+                    recipe_id=recipe_id, score=score, rank=0, computed_at=until
+                )
+            )
+        else:
+            row.score = _log_add(row.score, score)
+            row.computed_at = until
+            updated.append(row)
+    RecipePopularity.objects.bulk_update(
+        updated, ["score", "computed_at"], batch_size=5000
+    )
+    RecipePopularity.objects.bulk_create(created, batch_size=5000)
+    _rerank()
+    return len(scores)
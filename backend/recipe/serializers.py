@@ -1,9 +1,11 @@
 from django.core.files.base import ContentFile
 import base64
+from django.db import transaction
 from rest_framework import serializers
 
 from ingredient.models import Ingredient
 from ingredient.serializers import IngredientSerializer
+from ingredient.units import conversions
 from users.serializers import CustomUserSerializer
 from .models import Recipe, RecipeIngredient, Favorite, ShoppingCart
 
@@ -90,26 +92,60 @@ class RecipeSerializer(serializers.ModelSerializer):
         return value
 
     def create_ingredients(self, recipe, ingredients_data):
-        recipe_ingredients = [
-            RecipeIngredient(
-                recipe=recipe,
-                ingredient=Ingredient.objects.get(id=item["ingredient"]["id"]),
-                amount=item["amount"],
+        ingredients = Ingredient.objects.in_bulk(
+            [item["ingredient"]["id"] for item in ingredients_data]
+        )
+        units = conversions(
+            {
+                ingredient.measurement_unit
+                for ingredient in ingredients.values()
+            }
+        )
+        recipe_ingredients = []
+        snapshot = []
+        for item in ingredients_data:
+            ingredient = ingredients[item["ingredient"]["id"]]
+            canonical_unit, factor = units[ingredient.measurement_unit]
+            snapshot.append(
+                [
+                    ingredient.id,
+                    ingredient.name,
+                    ingredient.measurement_unit,
+                    item["amount"],
+                ]
+            )
+            recipe_ingredients.append(
+                RecipeIngredient(
+                    recipe=recipe,
+                    ingredient=ingredient,
+                    amount=item["amount"],
+                    canonical_amount=item["amount"] * factor,
+                    canonical_unit=canonical_unit,
+                )
             )
-            for item in ingredients_data
-        ]
         RecipeIngredient.objects.bulk_create(recipe_ingredients)
+        recipe.ingredients_snapshot = snapshot
+        Recipe.objects.filter(pk=recipe.pk).update(
+            ingredients_snapshot=snapshot
+        )
 
+    @transaction.atomic
     def create(self, validated_data):
         ingredients_data = validated_data.pop("recipe_ingredients")
         recipe = Recipe.objects.create(**validated_data)
         self.create_ingredients(recipe, ingredients_data)
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         ingredients_data = validated_data.pop("recipe_ingredients", None)
         instance = super().update(instance, validated_data)
         if ingredients_data:
-            instance.recipe_ingredients.all().delete()
+            # Без сигналов RecipeIngredient: они писали бы событие и
+            # сбрасывали снимок на каждую строку, а снимок тут же строится
+            # заново. Событие рецепта уже записано при его сохранении.
+            instance.recipe_ingredients.all()._raw_delete(
+                instance._state.db
+            )
             self.create_ingredients(instance, ingredients_data)
         return instance
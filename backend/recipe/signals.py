@@ -0,0 +1,137 @@
+from django.db.models import F, QuerySet
+from django.db.models.signals import (
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import receiver
+
+from ingredient.models import Ingredient, UnitConversion
+from ingredient.units import conversions
+from outbox.events import on_change, record
+from .fragment_cache import invalidate_all, invalidate_recipes
+from .models import Recipe, RecipeIngredient
+from .snapshots import SNAPSHOT_FIELDS, sync_ingredient
+
+
+def _deleted_with(origin, model):
+    """Удаление каскадное и начато с объектов model."""
+    if isinstance(origin, QuerySet):
+        return origin.model is model
+    return isinstance(origin, model)
+
+
+def _refresh_canonical(rows, units):
+    """Пересчитывает базовые количества строк с этими единицами."""
+    for unit, (canonical_unit, factor) in conversions(units).items():
+        rows.filter(ingredient__measurement_unit=unit).update(
+            canonical_amount=F("amount") * factor,
+            canonical_unit=canonical_unit,
+        )
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_saved(sender, instance, created, **kwargs):
+    if not created:
+        record("recipe", [instance.pk])
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_deleted(sender, instance, **kwargs):
+    record("recipe", [instance.pk])
+
+
+@receiver(post_save, sender=RecipeIngredient)
+@receiver(post_delete, sender=RecipeIngredient)
+def recipe_ingredient_changed(sender, instance, origin=None, **kwargs):
+    record("recipe", [instance.recipe_id])
+    # При удалении ингредиента снимки уже поправлены в ingredient_deleting,
+    # а при удалении рецепта сбрасывать нечего.
+    if _deleted_with(origin, Ingredient) or _deleted_with(origin, Recipe):
+        return
+    # Состав изменен в обход RecipeSerializer: снимок больше не верен, чтение
+    # идет через JOIN до пересборки (RecipeAdmin, check_ingredient_snapshots).
+    Recipe.objects.filter(pk=instance.recipe_id).update(
+        ingredients_snapshot=None
+    )
+
+
+@receiver(pre_save, sender=Ingredient)
+def ingredient_saving(sender, instance, update_fields=None, **kwargs):
+    # Снимки и кеши зависят только от названия и единицы измерения.
+    instance._snapshot_changed = False
+    if instance.pk is None or (
+        update_fields is not None
+        and not set(update_fields) & set(SNAPSHOT_FIELDS)
+    ):
+        return
+    previous = (
+        Ingredient.objects.filter(pk=instance.pk)
+        .values_list(*SNAPSHOT_FIELDS)
+        .first()
+    )
+    instance._snapshot_changed = previous is not None and previous != tuple(
+        getattr(instance, field) for field in SNAPSHOT_FIELDS
+    )
+
+
+@receiver(post_save, sender=Ingredient)
+def ingredient_saved(sender, instance, created, **kwargs):
+    if not created and instance._snapshot_changed:
+        sync_ingredient(instance)
+        _refresh_canonical(
+            RecipeIngredient.objects.filter(ingredient=instance),
+            [instance.measurement_unit],
+        )
+        record("ingredient", [instance.pk])
+
+
+@receiver(pre_delete, sender=Ingredient)
+def ingredient_deleting(sender, instance, **kwargs):
+    # После удаления связи с рецептами уже не найти.
+    sync_ingredient(instance, deleted=True)
+
+
+@receiver(post_delete, sender=Ingredient)
+def ingredient_deleted(sender, instance, **kwargs):
+    record("ingredient", [instance.pk])
+
+
+@receiver(pre_save, sender=UnitConversion)
+def unit_conversion_saving(sender, instance, **kwargs):
+    instance._previous_unit = None
+    if instance.pk is None:
+        return
+    instance._previous_unit = (
+        UnitConversion.objects.filter(pk=instance.pk)
+        .values_list("unit", flat=True)
+        .first()
+    )
+
+
+@receiver(post_save, sender=UnitConversion)
+@receiver(post_delete, sender=UnitConversion)
+def unit_conversion_changed(sender, instance, **kwargs):
+    # Правки в админке (в том числе list_editable) меняют множители уже
+    # сохраненных строк рецептов, иначе список покупок суммирует по старым.
+    units = {instance.unit, getattr(instance, "_previous_unit", None)}
+    units.discard(None)
+    _refresh_canonical(RecipeIngredient.objects.all(), units)
+
+
+@on_change("recipe")
+def evict_recipes(keys):
+    invalidate_recipes([int(key) for key in keys])
+
+
+@on_change("ingredient")
+def evict_ingredients(keys):
+    # Ингредиент входит в неизвестное число рецептов: сбрасываем поколение.
+    invalidate_all()
+
+
+@on_change("user")
+def evict_authors(keys):
+    recipes = Recipe.objects.filter(author_id__in=[int(key) for key in keys])
+    invalidate_recipes(recipes.values_list("id", flat=True))
@@ -0,0 +1,218 @@
+import numpy as np
+
+from .indexes import (
+    append_segment,
+    current_arrays,
+    index_lock,
+    latest_records,
+    load_arrays,
+    load_segment,
+    save_arrays,
+)
+from .models import RecipeIngredient
+
+INDEX_NAME = "similarity"
+# Дельта сливается с базой, когда в ней столько строк (или 10% базы).
+DELTA_MIN_ROWS = 1000
+NUM_PERMUTATIONS = 64
+BANDS = 16
+ROWS_PER_BAND = NUM_PERMUTATIONS // BANDS
+CHUNK_SIZE = 200_000
+
+# Хеш-функции вида (a * x + b) mod p; при p < 2**31 произведение
+# помещается в uint64 без переполнения.
+_PRIME = np.uint64((1 << 31) - 1)
+_EMPTY = np.uint32((1 << 31) - 1)
+_rng = np.random.default_rng(20240601)
+_A = _rng.integers(1, (1 << 31) - 1, NUM_PERMUTATIONS, dtype=np.uint64)
+_B = _rng.integers(0, (1 << 31) - 1, NUM_PERMUTATIONS, dtype=np.uint64)
+_BAND_MIX = _rng.integers(
+    1, 1 << 63, ROWS_PER_BAND, dtype=np.uint64
+) | np.uint64(1)
+
+
+def _hash(ingredient_ids):
+    values = np.asarray(ingredient_ids, dtype=np.uint64)[:, None]
+    return ((_A * values + _B) % _PRIME).astype(np.uint32)
+
+
+def signature(ingredient_ids):
+    if not len(ingredient_ids):
+        return np.full(NUM_PERMUTATIONS, _EMPTY, dtype=np.uint32)
+    return _hash(ingredient_ids).min(axis=0)
+
+
+def band_keys(signatures):
+    signatures = np.atleast_2d(signatures).astype(np.uint64)
+    keys = np.zeros((signatures.shape[0], BANDS), dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        for row in range(ROWS_PER_BAND):
+            keys = keys * np.uint64(0x100000001B3) ^ (
+                signatures[:, row::ROWS_PER_BAND] * _BAND_MIX[row]
+            )
+    return keys
+
+
+def compute_signatures(recipe_ids=None):
+    """Считает сигнатуры рецептов пачками строк RecipeIngredient."""
+    rows = RecipeIngredient.objects.order_by("recipe_id")
+    if recipe_ids is not None:
+        rows = rows.filter(recipe_id__in=recipe_ids)
+    ids, parts = [], []
+    batch = []
+
+    def flush():
+        pairs = np.array(batch, dtype=np.int64)
+        starts = np.flatnonzero(np.r_[True, pairs[1:, 0] != pairs[:-1, 0]])
+        ids.append(pairs[starts, 0])
+        parts.append(np.minimum.reduceat(_hash(pairs[:, 1]), starts, axis=0))
+        batch.clear()
+
+    for pair in rows.values_list("recipe_id", "ingredient_id").iterator(
+        chunk_size=10000
+    ):
+        batch.append(pair)
+        if len(batch) >= CHUNK_SIZE:
+            flush()
+    if batch:
+        flush()
+    if not ids:
+        return np.empty(0, dtype=np.int64), np.empty(
+            (0, NUM_PERMUTATIONS), dtype=np.uint32
+        )
+    ids = np.concatenate(ids)
+    signatures = np.concatenate(parts)
+    # Рецепт мог попасть на границу двух пачек: сливаем его части.
+    unique_ids, inverse = np.unique(ids, return_inverse=True)
+    merged = np.full(
+        (len(unique_ids), NUM_PERMUTATIONS), _EMPTY, dtype=np.uint32
+    )
+    np.minimum.at(merged, inverse, signatures)
+    return unique_ids, merged
+
+
+def _publish(ids, signatures):
+    keys = band_keys(signatures)
+    order = np.argsort(keys, axis=0, kind="stable").T.astype(np.int64)
+    sorted_keys = np.take_along_axis(keys.T, order, axis=1)
+    save_arrays(
+        INDEX_NAME,
+        {
+            "ids": ids,
+            "signatures": signatures,
+            "band_keys": sorted_keys,
+            "band_order": order,
+        },
+    )
+    return len(ids)
+
+
+def _delta_dtype(arrays=None):
+    return np.dtype(
+        [
+            ("id", "<i8"),
+            ("live", "u1"),
+            ("signature", "<u4", (NUM_PERMUTATIONS,)),
+        ]
+    )
+
+
+def _segments():
+    return {"delta": _delta_dtype}
+
+
+def build_index():
+    with index_lock(INDEX_NAME):
+        return _publish(*compute_signatures())
+
+
+def update_index(recipe_ids):
+    """Дописывает сигнатуры рецептов после создания, изменения или удаления.
+
+    Как и в индексе продуктов, базовые массивы версии не меняются: новые
+    сигнатуры попадают в сегмент delta, а когда он разрастается, индекс
+    сливается в новую версию.
+    """
+    with index_lock(INDEX_NAME):
+        # Кеш процесса может отставать: читаем CURRENT заново под блокировкой.
+        index = current_arrays(INDEX_NAME)
+        if index is None:
+            return build_index()
+        recipe_ids = np.unique(np.asarray(list(recipe_ids), dtype=np.int64))
+        new_ids, new_signatures = compute_signatures(recipe_ids.tolist())
+        # Рецепты без строк удалены или остались без ингредиентов.
+        records = np.zeros(len(recipe_ids), dtype=_delta_dtype())
+        records["id"] = recipe_ids
+        rows = np.searchsorted(recipe_ids, new_ids)
+        records["live"][rows] = 1
+        records["signature"][rows] = new_signatures
+        append_segment(INDEX_NAME, "delta", records)
+        delta = load_segment(INDEX_NAME, "delta", _delta_dtype())
+        if len(delta) < max(DELTA_MIN_ROWS, len(index["ids"]) // 10):
+            return len(index["ids"])
+        delta = latest_records(delta)
+        keep = ~np.isin(index["ids"], delta["id"])
+        live = delta["live"] > 0
+        ids = np.concatenate([index["ids"][keep], delta["id"][live]])
+        signatures = np.concatenate(
+            [index["signatures"][keep], delta["signature"][live]]
+        )
+        order = np.argsort(ids, kind="stable")
+        return _publish(ids[order], signatures[order])
+
+
+def _query_signature(recipe_id, ids, signatures, delta):
+    position = np.searchsorted(delta["id"], recipe_id)
+    if position < len(delta) and delta["id"][position] == recipe_id:
+        if delta["live"][position]:
+            return np.asarray(delta["signature"][position])
+    else:
+        position = np.searchsorted(ids, recipe_id)
+        if position < len(ids) and ids[position] == recipe_id:
+            return np.asarray(signatures[position])
+    return signature(
+        RecipeIngredient.objects.filter(recipe_id=recipe_id).values_list(
+            "ingredient_id", flat=True
+        )
+    )
+
+
+def similar_recipes(recipe_id, limit):
+    """Возвращает [(recipe_id, оценка Жаккара)] по убыванию оценки."""
+    index = load_arrays(INDEX_NAME, _segments())
+    if index is None:
+        return []
+    ids = index["ids"]
+    delta = latest_records(index["delta"])
+    query = _query_signature(recipe_id, ids, index["signatures"], delta)
+    query_keys = band_keys(query)[0]
+    candidates = []
+    for band in range(BANDS):
+        column = index["band_keys"][band]
+        start = np.searchsorted(column, query_keys[band], side="left")
+        end = np.searchsorted(column, query_keys[band], side="right")
+        candidates.append(index["band_order"][band][start:end])
+    candidates = np.unique(np.concatenate(candidates))
+    # Строки базы, замененные дельтой, не учитываются.
+    candidates = candidates[
+        (ids[candidates] != recipe_id)
+        & ~np.isin(ids[candidates], delta["id"])
+    ]
+    # Дельта небольшая: ее кандидатов ищем перебором по ключам полос.
+    live = delta[
+        (delta["live"] > 0)
+        & (delta["id"] != recipe_id)
+        & (band_keys(delta["signature"]) == query_keys).any(axis=1)
+    ]
+    found = np.concatenate([ids[candidates], live["id"]])
+    if not len(found):
+        return []
+    scores = np.concatenate(
+        [
+            (index["signatures"][candidates] == query).mean(axis=1),
+            (live["signature"] == query).mean(axis=1),
+        ]
+    )
+    # Равные по оценке — по id, как в базовых массивах.
+    best = np.lexsort((found, -scores))[:limit]
+    return [(int(found[i]), float(scores[i])) for i in best]
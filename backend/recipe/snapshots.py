@@ -0,0 +1,87 @@
+from django.db import transaction
+
+from .models import Recipe, RecipeIngredient
+
+BATCH_SIZE = 1000
+# Поля ингредиента, которые хранятся в снимках.
+SNAPSHOT_FIELDS = ("name", "measurement_unit")
+
+
+def expand(snapshot):
+    """Ингредиенты рецепта в формате ответа API из снимка."""
+    return [
+        {"id": pk, "name": name, "measurement_unit": unit, "amount": amount}
+        for pk, name, unit, amount in snapshot
+    ]
+
+
+def build_snapshots(recipe_ids):
+    """Снимки {id рецепта: [[id, название, единица, количество], ...]}."""
+    snapshots = {recipe_id: [] for recipe_id in recipe_ids}
+    for recipe_id, pk, name, unit, amount in (
+        RecipeIngredient.objects.filter(recipe_id__in=recipe_ids)
+        .order_by("recipe_id", "id")
+        .values_list(
+            "recipe_id",
+            "ingredient_id",
+            "ingredient__name",
+            "ingredient__measurement_unit",
+            "amount",
+        )
+    ):
+        snapshots[recipe_id].append([pk, name, unit, amount])
+    return snapshots
+
+
+def save_snapshots(snapshots):
+    recipes = [
+        Recipe(pk=recipe_id, ingredients_snapshot=snapshot)
+        for recipe_id, snapshot in snapshots.items()
+    ]
+    Recipe.objects.bulk_update(recipes, ["ingredients_snapshot"], BATCH_SIZE)
+
+
+def refresh_snapshots(recipe_ids):
+    save_snapshots(build_snapshots(recipe_ids))
+
+
+@transaction.atomic
+def sync_ingredient(ingredient, deleted=False):
+    """Переписывает ингредиент в уже построенных снимках рецептов.
+
+    Снимки правятся на месте, без повторного JOIN по составу рецептов.
+    Строки рецептов блокируются до конца транзакции, чтобы не затереть
+    снимок, который одновременно сохраняет RecipeSerializer.
+    """
+    recipes = (
+        Recipe.objects.select_for_update()
+        .filter(
+            ingredients_snapshot__isnull=False,
+            id__in=RecipeIngredient.objects.filter(
+                ingredient=ingredient
+            ).values("recipe_id"),
+        )
+        .only("id", "ingredients_snapshot")
+    )
+    batch = []
+    for recipe in recipes.iterator(chunk_size=BATCH_SIZE):
+        snapshot = []
+        for entry in recipe.ingredients_snapshot:
+            if entry[0] != ingredient.pk:
+                snapshot.append(entry)
+            elif not deleted:
+                snapshot.append(
+                    [
+                        ingredient.pk,
+                        ingredient.name,
+                        ingredient.measurement_unit,
+                        entry[3],
+                    ]
+                )
+        recipe.ingredients_snapshot = snapshot
+        batch.append(recipe)
+        if len(batch) >= BATCH_SIZE:
+            Recipe.objects.bulk_update(batch, ["ingredients_snapshot"])
+            batch = []
+    if batch:
+        Recipe.objects.bulk_update(batch, ["ingredients_snapshot"])
@@ -0,0 +1,26 @@
+from django.conf import settings
+
+from jobs.queue import periodic, task
+from .pantry import update_index as update_pantry_index
+from .popularity import recompute_popularity
+from .similarity import update_index as update_similarity_index
+
+
+@task("recipe.refresh_indexes")
+def refresh_indexes(recipe_ids):
+    """Дописывает изменившиеся рецепты в файловые индексы.
+
+    Воркер выполняет задачи в нескольких потоках и процессах; каждое
+    обновление идет под index_lock своего индекса, так что параллельные
+    задачи применяются по очереди и не теряют изменения друг друга.
+    """
+    update_pantry_index(recipe_ids)
+    update_similarity_index(recipe_ids)
+
+
+@periodic(
+    "recipe.recompute_popularity", settings.POPULARITY_RECOMPUTE_INTERVAL
+)
+def recompute_popularity_job():
+    """Учитывает в рейтинге события после прошлого пересчета."""
+    recompute_popularity()
@@ -3,44 +3,139 @@ from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
-from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
+from rest_framework.permissions import (
+    AllowAny,
+    IsAuthenticated,
+    IsAuthenticatedOrReadOnly,
+)
 from rest_framework.response import Response
 from django.db.models import Sum
 
+from api.mixins import ReplicaReadMixin, SparseFieldsetMixin
+from jobs.queue import enqueue
+from ingredient.units import display_units, humanize
 from .models import Recipe, Favorite, ShoppingCart, RecipeIngredient
 from .serializers import RecipeSerializer
 from .short_serializers import ShortRecipeSerializer
 from .filters import RecipeFilter
+from .fragment_cache import get_fragments, render_fragments, render_recipes
+from .pagination import RankPagination
+from .pantry import match_pantry
+from .similarity import similar_recipes
 
+SIMILAR_RECIPES_LIMIT = 6
+MAX_SIMILAR_RECIPES = 50
+PANTRY_MAX_MISSING = 2
+MAX_PANTRY_RESULTS = 500
+MAX_BATCH_IDS = 100
 
-class RecipeViewSet(viewsets.ModelViewSet):
+
+def _is_id_list(values):
+    """Список целых чисел из тела JSON (bool в Python тоже int)."""
+    return isinstance(values, list) and all(
+        isinstance(value, int) and not isinstance(value, bool)
+        for value in values
+    )
+
+
+class RecipeViewSet(
+    SparseFieldsetMixin, ReplicaReadMixin, viewsets.ModelViewSet
+):
     queryset = Recipe.objects.all()
     serializer_class = RecipeSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
     filter_backends = [DjangoFilterBackend]
     filterset_class = RecipeFilter
+    sparse_post_actions = ("batch",)
+    replica_post_actions = ("batch", "pantry")
 
     def get_filterset(self, *args, **kwargs):
         filterset = super().get_filterset(*args, **kwargs)
         filterset.request = self.request
         return filterset
 
+    def list(self, request, *args, **kwargs):
+        if "ids" in request.query_params:
+            return self.batch(request)
+        queryset = self.filter_queryset(self.get_queryset()).only("id")
+        page = self.paginate_queryset(queryset)
+        recipe_ids = [
+            recipe.id for recipe in (page if page is not None else queryset)
+        ]
+        results = render_recipes(recipe_ids, request, self.get_sparse_fields())
+        if page is not None:
+            return self.get_paginated_response(results)
+        return Response(results)
+
+    def retrieve(self, request, *args, **kwargs):
+        recipe = self.get_object()
+        return Response(
+            render_recipes([recipe.id], request, self.get_sparse_fields())[0]
+        )
+
+    @action(
+        detail=False, methods=["get", "post"], permission_classes=[AllowAny]
+    )
+    def batch(self, request):
+        ids = self._batch_ids(request)
+        if ids is None:
+            return Response(
+                {"errors": "ids должен быть списком идентификаторов."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        # Повторы отдаются один раз, порядок первого упоминания сохраняется.
+        ids = list(dict.fromkeys(ids))
+        if len(ids) > MAX_BATCH_IDS:
+            return Response(
+                {"errors": f"Не больше {MAX_BATCH_IDS} рецептов за запрос."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        fields = self.get_sparse_fields()
+        fragments = get_fragments(ids, fields)
+        results = render_fragments(fragments, ids, request, fields)
+        missing = [pk for pk in ids if pk not in fragments]
+        return Response({"results": results, "missing": missing})
+
+    @staticmethod
+    def _batch_ids(request):
+        """Идентификаторы из тела POST или параметра ids.
+
+        None, если ids не список целых чисел.
+        """
+        if request.method != "POST":
+            values = request.query_params.get("ids", "").split(",")
+            try:
+                return [int(value) for value in values if value.strip()]
+            except ValueError:
+                return None
+        if not isinstance(request.data, dict):
+            return None
+        ids = request.data.get("ids", [])
+        return ids if _is_id_list(ids) else None
+
+    def _refresh_indexes(self, recipe_id):
+        enqueue("recipe.refresh_indexes", [recipe_id])
+
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user)
+        recipe = serializer.save(author=self.request.user)
+        self._refresh_indexes(recipe.id)
 
     def perform_update(self, serializer):
         if self.get_object().author != self.request.user:
             return Response(
                 {"detail": "Недостаточно прав"}, status=status.HTTP_403_FORBIDDEN
             )
-        serializer.save()
+        recipe = serializer.save()
+        self._refresh_indexes(recipe.id)
 
     def perform_destroy(self, instance):
         if instance.author != self.request.user:
             return Response(
                 {"detail": "Недостаточно прав"}, status=status.HTTP_403_FORBIDDEN
             )
+        recipe_id = instance.id
         instance.delete()
+        self._refresh_indexes(recipe_id)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
     @action(
@@ -110,6 +205,100 @@ class RecipeViewSet(viewsets.ModelViewSet):
         cart.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+    @action(detail=False, methods=["get"], pagination_class=RankPagination)
+    def popular(self, request):
+        queryset = Recipe.objects.only("id").order_by("popularity__rank")
+        page = self.paginate_queryset(queryset)
+        return self.get_paginated_response(
+            render_recipes(
+                [recipe.id for recipe in page],
+                request,
+                self.get_sparse_fields(),
+            )
+        )
+
+    @action(detail=True, methods=["get"])
+    def similar(self, request, pk=None):
+        recipe = get_object_or_404(Recipe, id=pk)
+        try:
+            limit = int(
+                request.query_params.get("limit", SIMILAR_RECIPES_LIMIT)
+            )
+        except ValueError:
+            limit = SIMILAR_RECIPES_LIMIT
+        ranked = similar_recipes(
+            recipe.id, max(1, min(limit, MAX_SIMILAR_RECIPES))
+        )
+        recipes = Recipe.objects.in_bulk(
+            [recipe_id for recipe_id, _ in ranked]
+        )
+        serializer = ShortRecipeSerializer(
+            [
+                recipes[recipe_id]
+                for recipe_id, _ in ranked
+                if recipe_id in recipes
+            ],
+            many=True,
+            context={"request": request},
+        )
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    @action(
+        detail=False, methods=["get", "post"], permission_classes=[AllowAny]
+    )
+    def pantry(self, request):
+        params = self._pantry_params(request)
+        if params is None:
+            return Response(
+                {"errors": "Ингредиенты должны быть списком идентификаторов."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        ingredients, max_missing = params
+        if not ingredients:
+            return Response(
+                {"errors": "Необходимо указать хотя бы один ингредиент."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        matches = match_pantry(
+            ingredients, max(0, max_missing), MAX_PANTRY_RESULTS
+        )
+        page = self.paginate_queryset(matches)
+        recipes = Recipe.objects.in_bulk(
+            [recipe_id for recipe_id, _, _ in page]
+        )
+        results = []
+        for recipe_id, coverage, missing in page:
+            if recipe_id not in recipes:
+                continue
+            data = ShortRecipeSerializer(
+                recipes[recipe_id], context={"request": request}
+            ).data
+            data["coverage"] = round(coverage, 3)
+            data["missing"] = missing
+            results.append(data)
+        return self.get_paginated_response(results)
+
+    @staticmethod
+    def _pantry_params(request):
+        """Ингредиенты и допустимое число недостающих; None, если неверны."""
+        if request.method != "POST":
+            params = request.query_params
+            values = params.get("ingredients", "").split(",")
+            try:
+                return (
+                    [int(value) for value in values if value.strip()],
+                    int(params.get("max_missing", PANTRY_MAX_MISSING)),
+                )
+            except ValueError:
+                return None
+        if not isinstance(request.data, dict):
+            return None
+        ingredients = request.data.get("ingredients", [])
+        max_missing = request.data.get("max_missing", PANTRY_MAX_MISSING)
+        if not _is_id_list(ingredients) or not _is_id_list([max_missing]):
+            return None
+        return ingredients, max_missing
+
     @action(detail=True, methods=["get"])
     def get_link(self, request, pk=None):
         recipe = get_object_or_404(Recipe, id=pk)
@@ -120,18 +309,19 @@ class RecipeViewSet(viewsets.ModelViewSet):
     def download_shopping_cart(self, request):
         ingredients = (
             RecipeIngredient.objects.filter(recipe__in_shopping_cart__user=request.user)
-            .values("ingredient__name", "ingredient__measurement_unit")
-            .annotate(total_amount=Sum("amount"))
+            .values("ingredient__name", "canonical_unit")
+            .annotate(total_amount=Sum("canonical_amount"))
+            .order_by("ingredient__name", "canonical_unit")
         )
+        units = display_units()
 
-        content = "\n".join(
-            [
-                f"{item['ingredient__name']} "
-                f"({item['ingredient__measurement_unit']}) — "
-                f"{item['total_amount']}"
-                for item in ingredients
-            ]
-        )
+        lines = []
+        for item in ingredients:
+            amount, unit = humanize(
+                item["total_amount"], item["canonical_unit"], units
+            )
+            lines.append(f"{item['ingredient__name']} ({unit}) — {amount}")
+        content = "\n".join(lines)
         response = HttpResponse(content, content_type="text/plain")
         response["Content-Disposition"] = 'attachment; filename="shopping_list.txt"'
         return response
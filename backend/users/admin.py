@@ -1,3 +1,46 @@
 from django.contrib import admin
+from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 
-# Register your models here.
+from api.admin import LargeTableAdmin
+from .models import Follow, User
+
+
+@admin.register(User)
+class UserAdmin(BaseUserAdmin, LargeTableAdmin):
+    list_display = (
+        "id",
+        "username",
+        "email",
+        "first_name",
+        "last_name",
+        "is_staff",
+    )
+    search_fields = ("^username", "^email")
+    list_filter = ("is_staff", "is_active")
+    fieldsets = BaseUserAdmin.fieldsets + (
+        ("Аватар", {"fields": ("avatar",)}),
+    )
+    add_fieldsets = (
+        (
+            None,
+            {
+                "classes": ("wide",),
+                "fields": (
+                    "email",
+                    "username",
+                    "first_name",
+                    "last_name",
+                    "password1",
+                    "password2",
+                ),
+            },
+        ),
+    )
+
+
+@admin.register(Follow)
+class FollowAdmin(LargeTableAdmin):
+    list_display = ("id", "user", "following")
+    list_select_related = ("user", "following")
+    autocomplete_fields = ("user", "following")
+    search_fields = ("^user__username",)
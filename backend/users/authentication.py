@@ -0,0 +1,137 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from api import metrics
+from .models import User
+
+
+class LRUCache:
+    """Небольшой потокобезопасный LRU-кеш с временем жизни записей."""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+local_tokens = LRUCache(
+    settings.TOKEN_CACHE_LOCAL_SIZE, settings.TOKEN_CACHE_LOCAL_TIMEOUT
+)
+
+
+def token_digest(key):
+    """Хеш токена: под ним токен хранится в кешах и в событиях outbox."""
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def _cache_key(digest):
+    return f"auth-token:{digest}"
+
+
+# Хеш пароля в кеш не попадает: поле загружается из базы при обращении.
+CACHED_FIELDS = [
+    field for field in User._meta.concrete_fields if field.name != "password"
+]
+CACHED_USER_FIELDS = [field.attname for field in CACHED_FIELDS]
+
+
+def _cached_fields(user):
+    # get_prep_value: у файловых полей в кеш идет имя файла, а не FieldFile.
+    return [
+        field.get_prep_value(getattr(user, field.attname))
+        for field in CACHED_FIELDS
+    ]
+
+
+def _user(values):
+    return User.from_db("default", CACHED_USER_FIELDS, values)
+
+
+def invalidate_tokens(digests):
+    digests = list(digests)
+    for digest in digests:
+        local_tokens.pop(digest)
+    cache.delete_many([_cache_key(digest) for digest in digests])
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication без запроса к базе для часто используемых токенов.
+
+    Пользователь ищется сначала в LRU процесса, затем в кеше Django
+    (CACHES; общий для воркеров, только если это Redis или Memcached, а не
+    LocMem по умолчанию) и только потом в базе. Записи сбрасываются по
+    событиям outbox при удалении токена и при сохранении пользователя
+    (смена пароля, деактивация) во всех процессах.
+
+    В кешах хранятся значения полей без хеша пароля, и каждый запрос
+    собирает из них свой экземпляр пользователя: изменения в одном запросе
+    не попадают в другие.
+    """
+
+    def authenticate_credentials(self, key):
+        digest = token_digest(key)
+        values = local_tokens.get(digest)
+        result = "local_hit"
+        if values is None:
+            values = cache.get(_cache_key(digest))
+            result = "hit"
+            if values is None:
+                result = "miss"
+                try:
+                    token = Token.objects.select_related("user").get(key=key)
+                except Token.DoesNotExist:
+                    raise exceptions.AuthenticationFailed(_("Invalid token."))
+                values = _cached_fields(token.user)
+                if token.user.is_active:
+                    cache.set(
+                        _cache_key(digest),
+                        values,
+                        settings.TOKEN_CACHE_TIMEOUT,
+                    )
+            local_tokens.set(digest, values)
+        metrics.inc(
+            "foodgram_cache_requests_total", cache="auth_token", result=result
+        )
+        user = _user(values)
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed(
+                _("User inactive or deleted.")
+            )
+        return (user, Token(key=key, user=user))
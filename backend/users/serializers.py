@@ -14,6 +14,18 @@ class Base64ImageField(serializers.ImageField):
         return super().to_internal_value(data)
 
 
+def absolute_media_url(context, url):
+    """Абсолютный URL медиафайла.
+
+    Адрес сайта вычисляется один раз на контекст сериализатора.
+    """
+    origin = context.get("media_origin")
+    if origin is None:
+        origin = context["request"].build_absolute_uri("/").rstrip("/")
+        context["media_origin"] = origin
+    return origin + url if url.startswith("/") else url
+
+
 class UserCreateSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, required=True)
     first_name = serializers.CharField(required=True, max_length=150)
@@ -74,14 +86,19 @@ class CustomUserSerializer(serializers.ModelSerializer):
 
     def get_is_subscribed(self, obj):
         request = self.context.get("request")
-        if request and request.user.is_authenticated:
-            return Follow.objects.filter(user=request.user, following=obj).exists()
-        return False
+        if not request or not request.user.is_authenticated:
+            return False
+        # Списки и профили приходят с аннотацией из UserViewSet.get_queryset.
+        if hasattr(obj, "is_subscribed"):
+            return obj.is_subscribed
+        if obj.pk == request.user.pk:
+            return False
+        return Follow.objects.filter(user=request.user, following=obj).exists()
 
     def get_avatar(self, obj):
         request = self.context.get("request")
         if request and request.user.is_authenticated and obj.avatar:
-            return request.build_absolute_uri(obj.avatar.url)
+            return absolute_media_url(self.context, obj.avatar.url)
         return None
 
     def to_representation(self, instance):
@@ -110,6 +127,12 @@ class AvatarSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Поле avatar обязательно.")
         return value
 
+    def update(self, instance, validated_data):
+        # request.user собран из кеша токенов: сохраняем только аватар.
+        instance.avatar = validated_data["avatar"]
+        instance.save(update_fields=["avatar"])
+        return instance
+
 
 class SubscriptionSerializer(serializers.ModelSerializer):
     recipes = serializers.SerializerMethodField()
@@ -142,6 +165,8 @@ class SubscriptionSerializer(serializers.ModelSerializer):
         ).data
 
     def get_recipes_count(self, obj):
+        if hasattr(obj, "recipes_count"):
+            return obj.recipes_count
         return obj.recipes.count()
 
     def get_is_subscribed(self, obj):
@@ -149,7 +174,7 @@ class SubscriptionSerializer(serializers.ModelSerializer):
 
     def get_avatar(self, obj):
         if obj.avatar:
-            return self.context["request"].build_absolute_uri(obj.avatar.url)
+            return absolute_media_url(self.context, obj.avatar.url)
         return None
 
 
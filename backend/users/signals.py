@@ -0,0 +1,43 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from outbox.events import on_change, record
+from .authentication import invalidate_tokens, token_digest
+from .models import User
+
+# Поля, изменение которых не влияет на кешированные представления.
+IGNORED_USER_FIELDS = {"last_login"}
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    # Сами токены в таблицу событий не пишутся.
+    record("token", [token_digest(instance.key)])
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, update_fields=None, **kwargs):
+    if created or (
+        update_fields and set(update_fields) <= IGNORED_USER_FIELDS
+    ):
+        return
+    record("user", [instance.pk])
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    record("user", [instance.pk])
+
+
+@on_change("token")
+def evict_tokens(digests):
+    invalidate_tokens(digests)
+
+
+@on_change("user")
+def evict_user_tokens(keys):
+    tokens = Token.objects.filter(user_id__in=[int(key) for key in keys])
+    invalidate_tokens(
+        token_digest(key) for key in tokens.values_list("key", flat=True)
+    )
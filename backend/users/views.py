@@ -1,3 +1,4 @@
+from django.db.models import Count, Exists, OuterRef
 from django.shortcuts import get_object_or_404
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
@@ -5,6 +6,7 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from djoser.views import UserViewSet as DjoserUserViewSet
 
+from api.mixins import ReplicaReadMixin, SparseFieldsetMixin
 from .models import User, Follow
 from .serializers import (
     CustomUserSerializer,
@@ -15,10 +17,25 @@ from .serializers import (
 )
 
 
-class UserViewSet(DjoserUserViewSet):
+class UserViewSet(SparseFieldsetMixin, ReplicaReadMixin, DjoserUserViewSet):
     queryset = User.objects.all()
     serializer_class = CustomUserSerializer
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        user = self.request.user
+        if (
+            self.action in ("list", "retrieve")
+            and user.is_authenticated
+            and self.wants_field("is_subscribed")
+        ):
+            queryset = queryset.annotate(
+                is_subscribed=Exists(
+                    Follow.objects.filter(user=user, following=OuterRef("pk"))
+                )
+            )
+        return queryset
+
     def get_serializer_class(self):
         if self.action == "create":
             return UserCreateSerializer
@@ -62,10 +79,12 @@ class UserViewSet(DjoserUserViewSet):
     @action(detail=False, methods=["GET"], permission_classes=[IsAuthenticated])
     def subscriptions(self, request):
         queryset = User.objects.filter(following__user=request.user)
+        if self.wants_field("recipes_count"):
+            queryset = queryset.annotate(
+                recipes_count=Count("recipes", distinct=True)
+            )
         page = self.paginate_queryset(queryset)
-        serializer = SubscriptionSerializer(
-            page, many=True, context={"request": request}
-        )
+        serializer = self.get_serializer(page, many=True)
         return self.get_paginated_response(serializer.data)
 
     @action(
@@ -93,9 +112,9 @@ class UserViewSet(DjoserUserViewSet):
             return Response(
                 {"errors": "Аватар не установлен"}, status=status.HTTP_400_BAD_REQUEST
             )
-        user.avatar.delete(save=True)
+        user.avatar.delete(save=False)
         user.avatar = None
-        user.save()
+        user.save(update_fields=["avatar"])
         return Response(status=status.HTTP_204_NO_CONTENT)
 
     @action(
@@ -115,5 +134,5 @@ class UserViewSet(DjoserUserViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
         request.user.set_password(serializer.validated_data["new_password"])
-        request.user.save()
+        request.user.save(update_fields=["password"])
         return Response(status=status.HTTP_204_NO_CONTENT)